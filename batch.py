@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+from engine import EqualizerEngine, WienerFilter, denoise_file, equalize_file, mode_bands, slider_gain
+from fft_backend import backend
+from signal_source import open_source
+
+MODES = {
+    "uniform": "Uniform Mode",
+    "musical": "Musical Mode",
+    "animal": "Animal Song Mode",
+    "ecg": "ECG Abnormalities Mode",
+    "wiener": "Weiner Filter Mode",
+}
+
+
+def find_inputs(paths):
+    """Expand files and directories into (file, relative path) pairs for the WAV/CSV files
+    under them. A directory's files keep their path below it, prefixed with its name."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            top = os.path.basename(os.path.normpath(os.path.abspath(path)))
+            for root, _, names in os.walk(path):
+                files.extend(
+                    (os.path.join(root, name), os.path.join(top, os.path.relpath(os.path.join(root, name), path)))
+                    for name in sorted(names)
+                    if name.lower().endswith((".wav", ".csv"))
+                )
+        else:
+            files.append((path, os.path.basename(path)))
+    return files
+
+
+def result_path(relative_path, options):
+    """Where the result for an input is written: its relative path mirrored under the output directory."""
+    stem = os.path.splitext(relative_path)[0]
+    return os.path.join(options["output_dir"], f"{stem}_{options['mode']}.wav")
+
+
+def preset(mode, sample_rate, sliders):
+    """Bands of a preset at `sample_rate` and the gains of its slider values (default: all at 5)."""
+    if mode == "uniform":
+        width = sample_rate / 2 / 10
+        freq_ranges = [(width * i, width * (i + 1)) for i in range(10)]
+    else:
+        freq_ranges = mode_bands(MODES[mode], sample_rate)[1]
+    sliders = sliders or [5] * len(freq_ranges)
+    if len(sliders) != len(freq_ranges):
+        raise ValueError(f"{MODES[mode]} takes {len(freq_ranges)} gains, got {len(sliders)}")
+    return freq_ranges, [slider_gain(value) for value in sliders]
+
+
+def check_noise_range(noise, duration):
+    """Raise if the Wiener noise region (in seconds) runs past the end of the signal."""
+    noise_start, noise_end = noise
+    if noise_end > duration:
+        raise ValueError(f"noise region {noise_start:g}-{noise_end:g} s ends after the signal ({duration:.3f} s)")
+
+
+def stream_file(file_path, output_path, options, report):
+    """Process a sound file block by block, so memory does not grow with its length."""
+    started = time.perf_counter()
+    info = sf.info(file_path)
+    report["load"] = time.perf_counter() - started
+    report["samples"] = info.frames
+    report["channels"] = info.channels
+    report["sample_rate"] = info.samplerate
+    report["streamed"] = True
+
+    started = time.perf_counter()
+    if options["mode"] == "wiener":
+        check_noise_range(options["noise"], info.duration)
+        noise_start, noise_end = options["noise"]
+        denoise_file(file_path, output_path, noise_start, noise_end, options["alpha"], subtype="FLOAT")
+    else:
+        freq_ranges, gains = preset(options["mode"], info.samplerate, options["gains"])
+        equalize_file(file_path, output_path, freq_ranges, gains, subtype="FLOAT")
+    report["process"] = time.perf_counter() - started
+    report["write"] = 0.0
+
+
+def init_worker(fft_workers):
+    """Pool initializer: give each process its share of the cores for FFT threads."""
+    backend.workers = fft_workers
+
+
+def process_file(file_path, output_path, options):
+    """Apply one preset to one file; returns its timing report entry.
+
+    Sound files are streamed through the block-based equalizer / Wiener filter;
+    CSV signals, and Wiener noise regions shorter than one filter block, go
+    through the whole-signal path in memory.
+    """
+    report = {"file": file_path}
+    try:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        if not file_path.lower().endswith(".csv"):
+            noise_start, noise_end = options["noise"] or (0, 0)
+            short_noise = (noise_end - noise_start) * sf.info(file_path).samplerate < 2048
+            if options["mode"] != "wiener" or not short_noise:
+                stream_file(file_path, output_path, options, report)
+                report["output"] = output_path
+                return report
+
+        started = time.perf_counter()
+        source = open_source(file_path, dtype=options["dtype"], csv_rate=options["csv_rate"])
+        signal = source.to_frames() if source.channels > 1 else source.to_array()
+        report["load"] = time.perf_counter() - started
+        report["samples"] = len(signal)
+        report["channels"] = source.channels
+        report["sample_rate"] = source.sample_rate
+
+        started = time.perf_counter()
+        if options["mode"] == "wiener":
+            wiener = WienerFilter()
+            check_noise_range(options["noise"], len(signal) / source.sample_rate)
+            wiener.load(signal, source.sample_rate)
+            noise_start, noise_end = options["noise"]
+            wiener.set_noise_range(int(noise_start * source.sample_rate), int(noise_end * source.sample_rate))
+            output = wiener.apply(options["alpha"])[0]
+        else:
+            engine = EqualizerEngine(dtype=options["dtype"])
+            engine.load(signal, source.sample_rate)
+            freq_ranges, gains = preset(options["mode"], source.sample_rate, options["gains"])
+            engine.set_bands(freq_ranges)
+            engine.set_band_gains(gains)
+            output = engine.output()
+        report["process"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        sf.write(output_path, np.asarray(output, dtype=np.float32), round(source.sample_rate), subtype="FLOAT")
+        report["write"] = time.perf_counter() - started
+        report["output"] = output_path
+    except Exception as error:
+        report["error"] = f"{type(error).__name__}: {error}"
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Apply an equalizer preset to many WAV/CSV files in parallel.")
+    parser.add_argument("inputs", nargs="+", help="files or directories to process")
+    parser.add_argument("-m", "--mode", choices=sorted(MODES), default="uniform")
+    parser.add_argument("-g", "--gains", default="",
+                        help="comma-separated slider values 0-10, one per band (5 is unity)")
+    parser.add_argument("--noise", nargs=2, type=float, metavar=("START", "END"),
+                        help="noise region in seconds (wiener mode)")
+    parser.add_argument("--alpha", type=float, default=1.0, help="Wiener alpha (wiener mode)")
+    parser.add_argument("-o", "--output-dir", default="output")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--report", help="timing report path (default: <output-dir>/report.json)")
+    parser.add_argument("--csv-rate", type=float,
+                        help="sample rate of CSV inputs (default: inferred from the time column)")
+    parser.add_argument("--float32", action="store_true", help="process CSV signals in single precision (sound files are streamed)")
+    args = parser.parse_args(argv)
+    if args.mode == "wiener" and args.noise is None:
+        parser.error("wiener mode needs --noise START END")
+    if args.noise is not None and not 0 <= args.noise[0] < args.noise[1]:
+        parser.error("--noise needs 0 <= START < END")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+    options = {
+        "mode": args.mode,
+        "gains": [float(value) for value in args.gains.split(",") if value.strip()],
+        "noise": args.noise,
+        "alpha": args.alpha,
+        "output_dir": args.output_dir,
+        "dtype": "float32" if args.float32 else "float64",
+        "csv_rate": args.csv_rate,
+    }
+    inputs = find_inputs(args.inputs)
+    files = [file_path for file_path, _ in inputs]
+    outputs = [result_path(relative_path, options) for _, relative_path in inputs]
+    duplicates = sorted(path for path, count in Counter(outputs).items() if count > 1)
+    if duplicates:
+        for path in duplicates:
+            sources = [file_path for file_path, output in zip(files, outputs) if output == path]
+            print(f"duplicate output {path} for {', '.join(sources)}", file=sys.stderr)
+        return 2
+
+    processes = max(1, min(args.workers, len(files)))
+    fft_workers = max(1, (os.cpu_count() or 1) // processes)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(processes, initializer=init_worker, initargs=(fft_workers,)) as executor:
+        reports = list(executor.map(process_file, files, outputs, [options] * len(files)))
+    elapsed = time.perf_counter() - started
+
+    for report in reports:
+        if "error" in report:
+            print(f"FAILED  {report['file']}: {report['error']}")
+        else:
+            print(f"{report['load'] + report['process'] + report['write']:8.3f}s  {report['file']}")
+    failed = sum("error" in report for report in reports)
+    print(f"{len(reports) - failed}/{len(reports)} files in {elapsed:.2f}s")
+
+    report_path = args.report or os.path.join(args.output_dir, "report.json")
+    with open(report_path, "w") as file:
+        json.dump({"options": options, "elapsed": elapsed, "files": reports}, file, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
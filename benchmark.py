@@ -0,0 +1,278 @@
+"""Benchmarks for the load, FFT, equalizer, Wiener, spectrogram and waveform paths.
+
+Runs each case on the bundled Data/ files and on synthetic signals of the given
+lengths and writes the timings to JSON, so two runs (before/after a DSP change)
+can be compared with --compare:
+
+    python benchmark.py -o before.json
+    python benchmark.py -o after.json --compare before.json
+
+Multichannel files are processed with every channel, as the GUI does. The GUI
+cases run under the offscreen Qt platform, with the sidecar cache in a temporary
+directory (open_file is timed cold, open_file_cached after a first open), and
+are skipped when QtMultimedia (needed by the main window) cannot be loaded.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import soundfile as sf
+
+from cache import SidecarCache
+from engine import EqualizerEngine, WienerFilter, slider_gain
+from fft_backend import backend
+from signal_source import SignalSource, load_csv, open_source
+from spectrogram import StftTileCache
+from waveform import WaveformPyramid
+
+DATA_FILES = [
+    "Data/Animals_Musical Instruments/Animals_Music_ForTask.wav",
+    "Data/Wiener Scenarios/noised_woman.wav",
+    "Data/Trash/ECG/Normal.csv",
+    "Data/Synthetic/Synthetic_Signal_TIME.csv",
+]
+
+
+def measure(function, repeat=5, setup=None):
+    """Median/min/max wall time of `function()` over `repeat` runs, `setup()` untimed."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return {"median": statistics.median(times), "min": min(times), "max": max(times), "runs": repeat}
+
+
+def synthetic_signal(path, minutes, sample_rate=44100):
+    """Write a tones-plus-noise float WAV of the given length in chunks."""
+    rng = np.random.default_rng(0)
+    total, chunk = int(minutes * 60 * sample_rate), sample_rate * 60
+    with sf.SoundFile(path, "w", sample_rate, 1, subtype="FLOAT") as file:
+        for start in range(0, total, chunk):
+            t = np.arange(start, min(start + chunk, total)) / sample_rate
+            tones = sum(np.sin(2 * np.pi * frequency * t) for frequency in (220, 1000, 5000))
+            file.write((0.2 * tones + 0.05 * rng.standard_normal(len(t))).astype(np.float32))
+    return path
+
+
+def bench_signal(path, repeat, dtype=np.float64):
+    """Engine-level cases for one file."""
+    results = {}
+    is_csv = path.lower().endswith(".csv")
+    results["load"] = measure(
+        lambda: load_csv(path, dtype=dtype) if is_csv else SignalSource(path, dtype=dtype).to_array(), repeat
+    )
+    source = open_source(path, dtype=dtype)
+    signal = source.to_frames() if source.channels > 1 else source.to_array()
+    sample_rate = source.sample_rate
+
+    engine = EqualizerEngine(dtype=dtype)
+    results["fft"] = measure(lambda: engine.load(signal, sample_rate), repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        sidecar = SidecarCache(directory)
+        key = sidecar.key(path)
+        sidecar.save(key, "spectrum", engine.spectrum)
+        sidecar.save(key, "magnitudes", engine.original_magnitudes)
+        results["fft_reopen"] = measure(
+            lambda: engine.load(
+                signal, sample_rate, sidecar.load(sidecar.key(path), "spectrum"), sidecar.load(key, "magnitudes")
+            ),
+            repeat,
+        )
+        engine.load(signal, sample_rate)
+    engine.set_bands(engine.uniform_bands(10))
+    slider = iter(range(10 ** 9))
+
+    def slider_edit():
+        gains = np.ones(10)
+        gains[3] = slider_gain(next(slider) % 11)
+        engine.set_band_gains(gains)
+        engine.output()
+
+    results["slider_edit"] = measure(slider_edit, repeat)
+
+    wiener = WienerFilter()
+    wiener.load(signal, sample_rate)
+    wiener.set_noise_range(0, min(len(signal), int(0.5 * sample_rate)))
+    results["wiener"] = measure(lambda: wiener.apply(1.0), repeat)
+    results["alpha_sweep"] = measure(lambda: [wiener.apply(alpha) for alpha in range(1, 11)], max(1, repeat // 2))
+
+    cache = StftTileCache()
+    key = cache.key_for(source)
+    results["spectrogram_cold"] = measure(
+        lambda: cache.visible_power(key, source, 0, source.duration, 1000),
+        repeat, setup=lambda: cache.forget(key),
+    )
+    results["spectrogram_warm"] = measure(lambda: cache.visible_power(key, source, 0, source.duration, 1000), repeat)
+
+    results["waveform_pyramid"] = measure(lambda: WaveformPyramid(source), repeat)
+    pyramid = WaveformPyramid(source)
+    results["waveform_view"] = measure(lambda: pyramid.view(0, source.duration, 1000), repeat)
+    return {"samples": len(signal), "channels": source.channels, "sample_rate": sample_rate, "cases": results}
+
+
+def largest_prime_factor(n):
+    factor, largest = 2, 1
+    while factor * factor <= n:
+        while n % factor == 0:
+            largest, n = factor, n // factor
+        factor += 1
+    return max(largest, n)
+
+
+def bench_awkward(repeat, min_prime=100):
+    """Slider-edit latency with and without fast-length padding on Data/ files whose
+    length has a prime factor of at least `min_prime`."""
+    results = {}
+    for path in sorted(glob.glob("Data/**/*.wav", recursive=True)):
+        frames = sf.info(path).frames
+        prime = largest_prime_factor(frames)
+        if prime < min_prime:
+            continue
+        source = SignalSource(path)
+        signal = source.to_frames() if source.channels > 1 else source.to_array()
+        entry = {"samples": frames, "largest_prime_factor": prime, "fast_length": backend.fast_length(frames)}
+        for pad in (False, True):
+            backend.pad = pad
+            engine = EqualizerEngine()
+            engine.load(signal, source.sample_rate)
+            engine.set_bands(engine.uniform_bands(10))
+            engine.output()
+            values = iter(range(10 ** 9))
+            entry["padded" if pad else "unpadded"] = measure(
+                lambda: (engine.set_gain(3, slider_gain(next(values) % 11)), engine.output()), repeat
+            )
+        backend.pad = True
+        entry["speedup"] = entry["unpadded"]["median"] / entry["padded"]["median"]
+        results[os.path.relpath(path, "Data")] = entry
+        print(f"  {entry['speedup']:6.1f}x  {frames:9d} samples (prime {prime})  {path}")
+    return results
+
+
+def bench_gui(path, repeat, cache_dir):
+    """Main-window cases: open (cold and from the sidecar cache in `cache_dir`), slider
+    round trip, spectrogram and waveform setData."""
+    os.environ["SIGNAL_EQUALIZER_CACHE"] = cache_dir
+    try:
+        from PyQt5.QtCore import QThreadPool
+        from PyQt5.QtWidgets import QApplication
+        from main import MainApp
+    except ImportError as error:
+        return {"skipped": str(error)}
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    def settle():
+        window.equalizer_worker.pool.waitForDone()
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+
+    window = MainApp()
+    results = {
+        "open_file": measure(
+            lambda: (window.open_file(path), settle()), max(1, repeat // 2),
+            setup=window.sidecar.clear,
+        ),
+        "open_file_cached": measure(lambda: (window.open_file(path), settle()), max(1, repeat // 2)),
+    }
+    for viewer in (window.input_viewer, window.output_viewer):
+        viewer.media_player.stop()
+
+    slider = window.sliders[0]
+    values = iter(range(10 ** 9))
+    results["update_frequency_graph"] = measure(
+        lambda: (slider.setValue(next(values) % 11), window.update_frequency_graph(0), settle()), repeat
+    )
+    results["plot_spectrogram"] = measure(
+        lambda: (window.plot_spectrogram(window.input_viewer.source, window.input_spectrogram), settle()),
+        repeat, setup=lambda: window.stft_cache.forget(window.stft_cache.key_for(window.input_viewer.source)),
+    )
+    viewer = window.input_viewer
+    x, y = viewer.pyramid.view(0, viewer.source.duration, 1000)
+    results["waveform_setData"] = measure(lambda: (viewer.plot_item.setData(x, y), app.processEvents()), repeat)
+    window.close()
+    return {"cases": results}
+
+
+def compare(current, baseline, threshold, min_time=1e-3):
+    """Print each case's speed ratio against the baseline; cases at least `min_time`
+    long that got more than `threshold` slower are flagged and counted."""
+    regressions = 0
+    for name, entry in current["signals"].items():
+        old_entry = baseline["signals"].get(name, {})
+        old_cases = {**old_entry.get("cases", {}), **old_entry.get("gui", {}).get("cases", {})}
+        cases = {**entry.get("cases", {}), **entry.get("gui", {}).get("cases", {})}
+        for case, timing in cases.items():
+            if case in old_cases:
+                ratio = timing["median"] / max(old_cases[case]["median"], 1e-12)
+                slow = ratio > 1 + threshold and timing["median"] >= min_time
+                flag = "  REGRESSION" if slow else ""
+                regressions += bool(flag)
+                print(f"{ratio:6.2f}x  {name} / {case}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="benchmark.json")
+    parser.add_argument("--minutes", default="1,10,60", help="comma-separated synthetic signal lengths")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-gui", action="store_true", help="skip the main-window cases")
+    parser.add_argument("--no-awkward", action="store_true", help="skip the awkward-length FFT cases")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="engine precision (the GUI cases follow SIGNAL_EQUALIZER_DTYPE)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "dtype": args.dtype,
+        "signals": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [path for path in DATA_FILES if os.path.exists(path)]
+        for minutes in [float(value) for value in args.minutes.split(",") if value.strip()]:
+            paths.append(synthetic_signal(os.path.join(directory, f"synthetic_{minutes:g}min.wav"), minutes))
+
+        for path in paths:
+            name = os.path.basename(path)
+            print(f"{name} ...", flush=True)
+            entry = bench_signal(path, args.repeat, np.dtype(args.dtype))
+            if not args.no_gui:
+                entry["gui"] = bench_gui(path, args.repeat, os.path.join(directory, "sidecar"))
+            report["signals"][name] = entry
+            for case, timing in {**entry["cases"], **entry.get("gui", {}).get("cases", {})}.items():
+                print(f"  {case:24s} {timing['median'] * 1000:10.2f} ms")
+
+    if not args.no_awkward:
+        print("awkward lengths (slider edit, unpadded / padded):")
+        report["awkward"] = bench_awkward(args.repeat)
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            return 1 if compare(report, json.load(file), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from instrumentation import instruments
+
+
+class CachedOutput:
+    """One reconstructed output plus whatever was derived from it for display."""
+
+    def __init__(self, output, magnitudes):
+        self.output = output
+        self.magnitudes = magnitudes
+        self.extras = {}
+        self.nbytes = output.nbytes + magnitudes.nbytes
+
+
+class OutputCache:
+    """Memory-budgeted LRU cache of equalizer outputs.
+
+    Entries are keyed by (signal identity, band layout, quantized band gains), so
+    A/B-ing between slider settings reuses the output, its magnitudes and any plot
+    data attached to it instead of reconstructing them. Hits and misses are
+    counted here and in `instruments`.
+    """
+
+    def __init__(self, max_bytes=512 * 2 ** 20, decimals=6):
+        self.max_bytes = max_bytes
+        self.decimals = decimals
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self._by_output = {}
+        self._lock = threading.Lock()
+
+    def key(self, signal_key, freq_ranges, band_gains):
+        """Cache key for a loaded signal's id under the given bands and gains."""
+        bands = tuple(tuple(float(edge) for edge in band) for band in freq_ranges)
+        gains = tuple(np.round(np.asarray(band_gains, dtype=float), self.decimals).tolist())
+        return signal_key, bands, gains
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+        instruments.count("output_cache_miss" if entry is None else "output_cache_hit")
+        instruments.gauge("output_cache_hit_rate", self.hit_rate)
+        return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self._by_output[id(entry.output)] = key
+            self.bytes += entry.nbytes
+            self._evict()
+        instruments.gauge("output_cache_bytes", self.bytes)
+
+    def attach(self, output, name, value, nbytes=0):
+        """Keep `value` (e.g. plot data) with the cached entry for `output`, if it is cached."""
+        with self._lock:
+            key = self._by_output.get(id(output))
+            entry = self.entries.get(key)
+            if entry is None or entry.output is not output:
+                return
+            entry.extras[name] = value
+            entry.nbytes += nbytes
+            self.bytes += nbytes
+            self._evict()
+
+    def extra(self, output, name):
+        """Value attached to the cached entry for `output`, or None."""
+        with self._lock:
+            entry = self.entries.get(self._by_output.get(id(output)))
+            if entry is None or entry.output is not output:
+                return None
+            return entry.extras.get(name)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self._by_output.clear()
+            self.bytes = 0
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self._by_output.pop(id(entry.output), None)
+        self.bytes -= entry.nbytes
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            self._remove(next(iter(self.entries)))
+
+
+class SidecarCache:
+    """Size-bounded on-disk cache of per-file analysis arrays (spectra, tiles, pyramids).
+
+    Each source file gets a directory named after a hash of its contents, holding
+    one `.npy` per artifact; artifact names carry the parameters they depend on
+    (dtype, FFT length, channel, ...). Arrays are loaded memory-mapped, so a
+    reopen only maps the files and pages are read as they are used. The content
+    hash is remembered per (path, size, mtime), so an unchanged file is not read
+    again to find its entry. Least recently used entries are deleted once the
+    directory grows past `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=4 * 2 ** 30, chunk_size=2 ** 22):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.bytes = None
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(directory, "index.json")
+        self._index = None
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path) as file:
+                    self._index = json.load(file)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def key(self, file_path):
+        """Content-hash key of a file, or None if it cannot be read."""
+        try:
+            path = os.path.abspath(file_path)
+            stat = os.stat(path)
+            with self._lock:
+                stamp = self._load_index().get(path)
+            if stamp is not None and stamp[:2] == [stat.st_size, stat.st_mtime_ns]:
+                key = stamp[2]
+            else:
+                digest = hashlib.blake2b(digest_size=16)
+                with open(path, "rb") as file:
+                    for chunk in iter(lambda: file.read(self.chunk_size), b""):
+                        digest.update(chunk)
+                key = digest.hexdigest()
+                with self._lock:
+                    self._load_index()[path] = [stat.st_size, stat.st_mtime_ns, key]
+                    os.makedirs(self.directory, exist_ok=True)
+                    with open(self._index_path + ".tmp", "w") as file:
+                        json.dump(self._index, file)
+                    os.replace(self._index_path + ".tmp", self._index_path)
+        except OSError:
+            return None
+        return key
+
+    def _path(self, key, name):
+        return os.path.join(self.directory, key, name + ".npy")
+
+    def load(self, key, name):
+        """Memory-mapped artifact `name` of entry `key`, or None if it is not stored."""
+        path = self._path(key, name)
+        try:
+            array = np.load(path, mmap_mode="r")
+            os.utime(os.path.dirname(path))
+        except (OSError, ValueError):
+            instruments.count("sidecar_miss")
+            return None
+        instruments.count("sidecar_hit")
+        return array
+
+    def save(self, key, name, array):
+        """Store `array` as artifact `name` of entry `key`, then trim the cache to size."""
+        path = self._path(key, name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as file:
+                np.save(file, np.asarray(array))
+            os.replace(path + ".tmp", path)
+            with self._lock:
+                if self.bytes is None:
+                    self.bytes = sum(size for _, size, _ in self._entries())
+                else:
+                    self.bytes += os.path.getsize(path)
+                self._evict(keep=key)
+        except OSError:
+            return
+        instruments.gauge("sidecar_bytes", self.bytes)
+
+    def fetch(self, key, name, compute):
+        """Stored artifact `name`, or `compute()`'s result, stored for next time."""
+        if key is None:
+            return compute()
+        array = self.load(key, name)
+        if array is None:
+            array = compute()
+            self.save(key, name, array)
+        return array
+
+    def clear(self):
+        """Delete every stored entry and the remembered content hashes."""
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._index = None
+            self.bytes = None
+
+    def _entries(self):
+        """(key, size, last use) of every stored entry."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                files = list(os.scandir(entry.path))
+                entries.append((entry.name, sum(file.stat().st_size for file in files), entry.stat().st_mtime))
+        return entries
+
+    def _evict(self, keep=None):
+        if self.bytes <= self.max_bytes:
+            return
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self.bytes = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if self.bytes <= self.max_bytes:
+                break
+            if key != keep:
+                shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+                self.bytes -= size
@@ -0,0 +1,516 @@
+import itertools
+import warnings
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import get_window, welch
+
+from fft_backend import backend
+from instrumentation import span
+from signal_source import SignalSource
+
+MODE_BANDS = {
+    "Musical Mode": (
+        ["Drums", "Violin", "OOOh", "R", "S", "Xylophone"],
+        [(0, 400), (400, 4000), (200, 800), (1320, 4400), (2200, 13500), (4000, 20000)],
+    ),
+    "Animal Song Mode": (
+        ["Trumpet", "Whale", "Piano", "Frog", "Cardinal", "Xylophone"],
+        [(0, 600), (600, 1200), (1200, 1600), (1600, 2800), (2800, 3600), (4000, 20000)],
+    ),
+    "ECG Abnormalities Mode": (
+        ["Normal", "AFib", "VT", "VC"],
+        [(0, 22000), (200, 450), (80, 864), (0, 1000)],
+    ),
+}
+
+# The ECG bands were tuned with the recordings played back at 44.1 kHz; they are
+# scaled to a file's actual rate (AFib's 200-450 Hz is 1.6-3.7 Hz at 360 Hz) so
+# they select the same part of its spectrum.
+MODE_REFERENCE_RATES = {"ECG Abnormalities Mode": 44100}
+
+
+def mode_bands(mode, sample_rate=None):
+    """Labels and (min, max) Hz bands of a preset mode for a signal sampled at `sample_rate`."""
+    labels, freq_ranges = MODE_BANDS[mode]
+    reference_rate = MODE_REFERENCE_RATES.get(mode)
+    if reference_rate and sample_rate:
+        scale = sample_rate / reference_rate
+        freq_ranges = [(low * scale, high * scale) for low, high in freq_ranges]
+    return labels, freq_ranges
+
+
+def slider_gain(value):
+    """ Map a 0-10 slider position to a linear band gain (5 is unity). """
+    return 1 + (value - 5) * 0.2
+
+
+class BandTable:
+    def __init__(self, freqs, freq_ranges):
+        """ Compile [min, max) Hz bands into bin slices over a sorted frequency axis.
+
+        The axis is cut at every band edge into segments; each segment records which
+        bands cover it, so overlapping bands multiply their gains regardless of the
+        order in which the sliders were moved.
+        """
+        self.freq_ranges = list(freq_ranges)
+        edges = np.searchsorted(freqs, np.asarray(self.freq_ranges, dtype=float).reshape(-1, 2))
+        self.slices = [slice(start, stop) for start, stop in edges]
+        for (low, high), (start, stop) in zip(self.freq_ranges, edges):
+            if low < high and start == stop == len(freqs):
+                warnings.warn(f"band ({low:g}, {high:g}) Hz lies above the top frequency "
+                              f"({freqs[-1]:g} Hz) and has no effect")
+        bounds = np.unique(np.concatenate(([0, len(freqs)], edges.ravel())))
+        starts = bounds[:-1]
+        self.lengths = np.diff(bounds)
+        self.membership = (edges[:, 0] <= starts[:, None]) & (starts[:, None] < edges[:, 1])
+
+    def __len__(self):
+        return len(self.slices)
+
+    def gain_vector(self, band_gains):
+        """Expand one gain per band into one gain per frequency bin."""
+        segment_gains = np.where(self.membership, np.asarray(band_gains, dtype=float), 1.0).prod(axis=1)
+        return np.repeat(segment_gains, self.lengths)
+
+
+def spectrum_magnitudes(spectrum):
+    """|X| per bin; for an (bins, C) multichannel spectrum, the RMS over channels."""
+    if spectrum.ndim == 1:
+        return np.abs(spectrum)
+    return np.sqrt((spectrum.real ** 2 + spectrum.imag ** 2).mean(axis=1))
+
+
+_signal_keys = itertools.count()
+
+
+class EqualizerEngine:
+    def __init__(self, dtype=np.float64):
+        """ Headless equalizer: holds a signal, its spectrum and the band edits.
+
+        The output is rebuilt with one IFFT of the whole gained spectrum when it is
+        asked for after a gain change. (Adding the IFFT of just the changed band's
+        delta was tried: it needs a full-length transform all the same, so it saved
+        nothing and accumulated rounding drift.)
+
+        `dtype=np.float32` keeps the samples, gains and magnitudes in float32 and the
+        spectrum in complex64 (scipy.fft transforms in single precision), halving
+        memory and transform time; outputs stay within about 1e-6 of the peak of
+        the float64 path.
+
+        Transforms go through `fft_backend.backend`, so the spectrum and `freqs`
+        cover the signal zero-padded to a fast FFT length. An (N, C) signal is
+        transformed and rebuilt with every channel in one batched call along axis 0;
+        the gains are shared and the magnitudes are the RMS over channels.
+        """
+        self.dtype = np.dtype(dtype)
+        self.signal = None
+        self.signal_key = None
+        self.sample_rate = 0
+        self.spectrum = None
+        self.freqs = None
+        self.positive_freqs = None
+        self.original_magnitudes = None
+        self.modified_magnitudes = None
+        self.gains = None
+        self.bands = None
+        self.band_gains = None
+        self.current_output = None
+
+    def load(self, signal, sample_rate, spectrum=None, magnitudes=None):
+        """Load an (N,) or (N, C) signal and compute its real-signal spectrum.
+
+        A `spectrum` and `magnitudes` computed earlier for the same signal (e.g.
+        memory-mapped from the sidecar cache) are used as they are. Bands already
+        set are recompiled against the new frequency axis.
+        """
+        self.signal = np.asarray(signal, dtype=self.dtype)
+        self.signal_key = next(_signal_keys)
+        self.sample_rate = sample_rate
+        with span("fft"):
+            self.spectrum = backend.rfft(self.signal) if spectrum is None else spectrum
+            self.freqs = backend.rfftfreq(len(self.signal), 1 / self.sample_rate).astype(self.dtype)
+            self.positive_freqs = self.freqs
+            self.original_magnitudes = spectrum_magnitudes(self.spectrum) if magnitudes is None else magnitudes
+        if self.bands is not None:
+            self.bands = BandTable(self.freqs, self.bands.freq_ranges)
+        self.reset_gains()
+
+    def reset_gains(self):
+        """Drop all band edits and return to the original magnitudes."""
+        if self.original_magnitudes is not None:
+            if self.bands is not None:
+                self.band_gains = np.ones(len(self.bands))
+            self.gains = np.ones(len(self.spectrum), dtype=self.dtype)
+            self.modified_magnitudes = self.original_magnitudes.copy()
+            self.current_output = None
+
+    def uniform_bands(self, count=10):
+        """Split the positive spectrum into `count` equal-width bands."""
+        width = (self.positive_freqs[-1] - self.positive_freqs[0]) / count
+        return [(width * i, width * (i + 1)) for i in range(count)]
+
+    def set_bands(self, freq_ranges):
+        """Compile the current mode's bands against the loaded spectrum."""
+        self.bands = BandTable(self.freqs, freq_ranges)
+        self.reset_gains()
+
+    def _require_bands(self):
+        if self.bands is None:
+            raise RuntimeError("no bands set; call set_bands() after load() first")
+
+    def set_band_gains(self, band_gains):
+        """Set every band gain at once and rebuild the per-bin gain vector."""
+        self._require_bands()
+        with span("gain_apply"):
+            self.band_gains = np.asarray(band_gains, dtype=float)
+            gains = self.bands.gain_vector(self.band_gains).astype(self.dtype, copy=False)
+            if not np.array_equal(gains, self.gains):
+                self.current_output = None
+            self.gains = gains
+            self.modified_magnitudes = self.original_magnitudes * self.gains
+
+    def _per_bin(self, values):
+        """Reshape per-bin values to broadcast against the (bins,) or (bins, C) spectrum."""
+        return values.reshape(values.shape + (1,) * (self.spectrum.ndim - 1))
+
+    def restore(self, band_gains, output):
+        """Adopt band gains whose output is already known (e.g. cached), skipping the IFFT."""
+        self._require_bands()
+        with span("gain_apply"):
+            self.band_gains = np.asarray(band_gains, dtype=float)
+            self.gains = self.bands.gain_vector(self.band_gains).astype(self.dtype, copy=False)
+            self.modified_magnitudes = self.original_magnitudes * self.gains
+            self.current_output = output
+
+    def set_gain(self, index, gain):
+        """Change the gain of a single band."""
+        self._require_bands()
+        band_gains = self.band_gains.copy()
+        band_gains[index] = gain
+        self.set_band_gains(band_gains)
+
+    def output(self):
+        """Reconstruct the time-domain signal; the phase is kept by scaling the spectrum."""
+        if self.current_output is None:
+            with span("ifft"):
+                self.current_output = backend.irfft(self.spectrum * self._per_bin(self.gains), len(self.signal))
+        return self.current_output
+
+
+class StreamingStft:
+    def __init__(self, sample_rate, block_size=4096, hop=1024):
+        """ Block-based STFT overlap-add processor for inputs of any length.
+
+        Frames of `block_size` samples, `hop` apart, are windowed with a square-root
+        Hann window on both analysis and synthesis; subclasses change the spectra of
+        each chunk of frames in `filter_spectra`, with memory bounded by the block.
+        Blocks are (n,) or (n, C); all channels go through the same batched
+        transforms.
+        """
+        if block_size % hop:
+            raise ValueError("hop must divide block_size")
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.hop = hop
+        self.window = np.sqrt(get_window("hann", block_size))
+        self.norm = (self.window ** 2).reshape(-1, hop).sum(axis=0)
+        self.freqs = np.fft.rfftfreq(block_size, 1 / sample_rate)
+
+    def filter_spectra(self, spectra):
+        """Modify a (frames, bins, C) array of frame spectra."""
+        return spectra
+
+    def _overlap_add(self, frames, tail):
+        """Overlap-add synthesized frames onto the carried tail; returns (done, tail)."""
+        frame_count, channels = len(frames), frames.shape[2]
+        overlap = self.block_size - self.hop
+        acc = np.zeros((frame_count * self.hop + overlap, channels))
+        acc[:overlap] += tail
+        parts = frames.reshape(frame_count, -1, self.hop, channels)
+        for r in range(parts.shape[1]):
+            acc[r * self.hop: r * self.hop + frame_count * self.hop] += parts[:, r].reshape(-1, channels)
+        done = acc[: frame_count * self.hop].reshape(frame_count, self.hop, channels) / self.norm[:, None]
+        return done.reshape(-1, channels), acc[frame_count * self.hop:]
+
+    def _process_frames(self, pending, power=None):
+        """Filter every complete frame in `pending`; returns (frames, consumed samples)."""
+        frame_count = (len(pending) - self.block_size) // self.hop + 1
+        starts = np.arange(frame_count)[:, None] * self.hop
+        window = self.window[:, None]
+        frames = pending[starts + np.arange(self.block_size)] * window
+        spectra = self.filter_spectra(backend.rfft_frames(frames, axis=1))
+        self._add_power(spectra, power)
+        frames = backend.irfft_frames(spectra, self.block_size, axis=1) * window
+        return frames, frame_count * self.hop
+
+    @staticmethod
+    def _add_power(spectra, power):
+        if power is not None:
+            power += (spectra.real ** 2 + spectra.imag ** 2).sum(axis=0).mean(axis=1)
+
+    def power_magnitudes(self, power):
+        """|X| per bin of the whole signal, estimated from the frame power summed by `synthesize`/`process`."""
+        return np.sqrt(power * self.hop / np.sum(self.window ** 2))
+
+    def analyze(self, signal, chunk_frames=256):
+        """Spectra (frames, bins, C) of the frames `process` would take from a whole (N,) or (N, C) signal."""
+        signal = np.asarray(signal, dtype=np.float64)
+        signal = signal[:, None] if signal.ndim == 1 else signal
+        channels = signal.shape[1]
+        overlap = self.block_size - self.hop
+        padded = np.concatenate((np.zeros((overlap, channels)), signal, np.zeros((self.block_size, channels))))
+        frame_count = (len(padded) - self.block_size) // self.hop + 1
+        window = self.window[:, None]
+        spectra = np.empty((frame_count, self.block_size // 2 + 1, channels), dtype=complex)
+        for first in range(0, frame_count, chunk_frames):
+            starts = np.arange(first, min(first + chunk_frames, frame_count))[:, None] * self.hop
+            frames = padded[starts + np.arange(self.block_size)] * window
+            spectra[first:first + len(starts)] = backend.rfft_frames(frames, axis=1)
+        return spectra
+
+    def synthesize(self, spectra, length, chunk_frames=256, power=None):
+        """Filter `analyze`'s spectra and overlap-add them into the (length, C) output of `process`.
+
+        A (bins,) `power` array gets the filtered frames' |X|^2 added to it, summed over
+        frames and averaged over channels; `power_magnitudes` turns it into magnitudes.
+        """
+        overlap = self.block_size - self.hop
+        tail = np.zeros((overlap, spectra.shape[2]))
+        output = np.empty((len(spectra) * self.hop, spectra.shape[2]))
+        window = self.window[:, None]
+        for first in range(0, len(spectra), chunk_frames):
+            filtered = self.filter_spectra(spectra[first:first + chunk_frames])
+            self._add_power(filtered, power)
+            frames = backend.irfft_frames(filtered, self.block_size, axis=1) * window
+            done, tail = self._overlap_add(frames, tail)
+            output[first * self.hop:first * self.hop + len(done)] = done
+        return output[overlap:overlap + length]
+
+    def process(self, blocks, power=None):
+        """Equalize an iterable of (n,) or (n, C) input blocks, yielding output blocks as they complete.
+
+        `power` collects the filtered frames' power as in `synthesize`.
+        """
+        overlap = self.block_size - self.hop
+        pending = tail = None
+        to_skip = overlap
+        remaining = 0
+        flushing = False
+        blocks = iter(blocks)
+        while True:
+            block = next(blocks, None)
+            if block is None:
+                if flushing or pending is None:
+                    return
+                flushing = True
+                block = np.zeros((self.block_size, pending.shape[1]))
+            else:
+                block = np.asarray(block, dtype=np.float64)
+                mono = block.ndim == 1
+                if mono:
+                    block = block[:, None]
+                if pending is None:
+                    pending = np.zeros((overlap, block.shape[1]))
+                    tail = np.zeros((overlap, block.shape[1]))
+                remaining += len(block)
+            pending = np.concatenate((pending, block))
+            if len(pending) < self.block_size:
+                continue
+            frames, consumed = self._process_frames(pending, power)
+            pending = pending[consumed:]
+            done, tail = self._overlap_add(frames, tail)
+            if to_skip:
+                skipped = min(to_skip, len(done))
+                done = done[skipped:]
+                to_skip -= skipped
+            done = done[:remaining]
+            remaining -= len(done)
+            if len(done):
+                yield done[:, 0] if mono else done
+
+
+class StreamingEqualizer(StreamingStft):
+    def __init__(self, sample_rate, freq_ranges, band_gains, block_size=4096, hop=1024):
+        """ Streaming equalizer applying the whole-file path's band gains frame by frame. """
+        super().__init__(sample_rate, block_size, hop)
+        self.gains = BandTable(self.freqs, freq_ranges).gain_vector(band_gains)
+
+    def filter_spectra(self, spectra):
+        return spectra * self.gains[:, None]
+
+
+class StreamingWienerFilter(StreamingStft):
+    def __init__(self, sample_rate, noise, alpha=1.0, block_size=2048, hop=512):
+        """ STFT-domain Wiener filter with a per-bin noise PSD.
+
+        The noise power of every frequency bin is a Welch average over frames of the
+        selected noise region, taken with the same window as the filter; each frame
+        of the signal then gets its own per-bin gain P / (P + alpha * N).
+        """
+        super().__init__(sample_rate, block_size, hop)
+        self.alpha = alpha
+        self.noise_psd = self.estimate_noise_psd(noise)
+
+    def estimate_noise_psd(self, noise):
+        """Expected |X|^2 of a noise frame, per bin and channel, averaged Welch-style over the region."""
+        if len(noise) < self.block_size:
+            raise ValueError(f"noise region needs at least {self.block_size} samples")
+        noise = np.asarray(noise)
+        _, psd = welch(
+            noise if noise.ndim > 1 else noise[:, None], self.sample_rate, window=self.window,
+            noverlap=self.block_size - self.hop, detrend=False, return_onesided=False, scaling="spectrum",
+            axis=0,
+        )
+        return psd[: self.block_size // 2 + 1] * self.window.sum() ** 2
+
+    def filter_spectra(self, spectra):
+        power = spectra.real ** 2 + spectra.imag ** 2
+        denominator = power + self.alpha * self.noise_psd
+        gain = np.divide(power, denominator, out=np.zeros_like(power), where=denominator > 0)
+        return spectra * gain
+
+
+def equalize_file(input_path, output_path, freq_ranges, band_gains, block_size=4096, hop=1024,
+                  read_size=262144, subtype=None):
+    """Stream a sound file through a StreamingEqualizer and write the result as it is produced."""
+    source = SignalSource(input_path)
+    equalizer = StreamingEqualizer(source.sample_rate, freq_ranges, band_gains, block_size, hop)
+    with sf.SoundFile(output_path, "w", source.sample_rate, source.channels, subtype) as output_file:
+        for output_block in equalizer.process(source.frame_blocks(read_size)):
+            with span("file_write"):
+                output_file.write(output_block)
+
+
+def denoise_file(input_path, output_path, noise_start, noise_end, alpha=1.0, block_size=2048, hop=512,
+                 read_size=262144, subtype=None):
+    """Stream a sound file through a StreamingWienerFilter; the noise range is in seconds."""
+    source = SignalSource(input_path)
+    noise = source.read_frames(int(noise_start * source.sample_rate), int(noise_end * source.sample_rate))
+    wiener = StreamingWienerFilter(source.sample_rate, noise, alpha, block_size, hop)
+    with sf.SoundFile(output_path, "w", source.sample_rate, source.channels, subtype) as output_file:
+        for output_block in wiener.process(source.frame_blocks(read_size)):
+            with span("file_write"):
+                output_file.write(output_block)
+
+
+class NoiseStatistics:
+    def __init__(self, signal, prefix_sums=None):
+        """ Prefix sums of x and x^2, so any region's mean and variance cost O(1).
+
+        For an (N, C) signal the sums are kept per channel and `variance` averages them.
+        Both are kept in one (2, N + 1, ...) `prefix_sums` array, which can be passed
+        back in (e.g. from the sidecar cache) instead of being recomputed.
+        """
+        if prefix_sums is None:
+            signal = np.asarray(signal, dtype=np.float64)
+            prefix_sums = np.zeros((2, len(signal) + 1) + signal.shape[1:])
+            np.cumsum(signal, axis=0, out=prefix_sums[0, 1:])
+            np.cumsum(signal * signal, axis=0, out=prefix_sums[1, 1:])
+        self.length = prefix_sums.shape[1] - 1
+        self.prefix_sums = prefix_sums
+        self.sums, self.squares = prefix_sums
+
+    def variance(self, start_idx, end_idx):
+        """Variance of samples [start_idx, end_idx), 0 for an empty region."""
+        start_idx = min(max(0, int(start_idx)), self.length)
+        end_idx = min(max(0, int(end_idx)), self.length)
+        count = end_idx - start_idx
+        if count <= 0:
+            return 0
+        mean = (self.sums[end_idx] - self.sums[start_idx]) / count
+        variance = (self.squares[end_idx] - self.squares[start_idx]) / count - mean * mean
+        return max(0.0, float(np.mean(variance)))
+
+
+class WienerFilter:
+    def __init__(self, method="stft", block_size=2048, hop=512, max_frame_bytes=512 * 2 ** 20):
+        """ Wiener filter that caches everything alpha does not affect.
+
+        With `method="stft"` each frame gets a per-bin gain against a Welch noise PSD
+        of the selected region (see StreamingWienerFilter); noise regions shorter than
+        one block, and `method="global"`, use one whole-signal gain against the scalar
+        noise variance. The spectra and noise estimates only change with the signal
+        or the noise range, so an alpha change costs one filtering pass: the frame
+        spectra of the signal are kept (up to `max_frame_bytes`; longer signals are
+        re-analysed block by block) and only the gains and the inverse transforms
+        are redone. (N, C) signals are filtered per channel with batched transforms.
+        """
+        self.method = method
+        self.block_size = block_size
+        self.hop = hop
+        self.max_frame_bytes = max_frame_bytes
+        self.frame_spectra = None
+        self.signal = None
+        self.sample_rate = 0
+        self.spectrum = None
+        self.power_spectrum = None
+        self.freqs = None
+        self.noise_range = None
+        self.noise_power = 0
+        self.stft_filter = None
+        self.stats = None
+
+    def load(self, signal, sample_rate, stats=None):
+        """Take a new signal, with its NoiseStatistics if already known; a no-op when
+        the same signal is loaded again."""
+        if signal is self.signal and sample_rate == self.sample_rate:
+            return
+        self.signal = signal
+        self.sample_rate = sample_rate
+        self.spectrum = None
+        self.power_spectrum = None
+        self.freqs = backend.rfftfreq(len(signal), 1 / sample_rate)
+        self.stats = stats if stats is not None else NoiseStatistics(signal)
+        self.frame_spectra = None
+        self.noise_range = None
+        self.noise_power = 0
+        self.stft_filter = None
+
+    def set_noise_range(self, start_idx, end_idx):
+        """Estimate the noise power of samples [start_idx, end_idx) if the range moved."""
+        if (start_idx, end_idx) != self.noise_range:
+            self.noise_range = (start_idx, end_idx)
+            noise = self.signal[max(0, start_idx):end_idx]
+            self.noise_power = self.stats.variance(start_idx, end_idx)
+            self.stft_filter = None
+            if self.method == "stft" and len(noise) >= self.block_size:
+                with span("noise_psd"):
+                    self.stft_filter = StreamingWienerFilter(
+                        self.sample_rate, noise, block_size=self.block_size, hop=self.hop
+                    )
+        return self.noise_power
+
+    def apply(self, alpha=1.0):
+        """Filter the signal; returns the filtered signal, freqs and magnitudes.
+
+        The STFT filter's magnitudes come from the filtered frames themselves, on the
+        frame bins (a Welch average scaled to the whole signal's spectrum level), so
+        no transform of the whole output is needed.
+        """
+        with span("wiener"):
+            if self.stft_filter is not None:
+                self.stft_filter.alpha = alpha
+                frames = len(self.signal) // self.hop + self.block_size // self.hop
+                channels = 1 if np.ndim(self.signal) == 1 else self.signal.shape[1]
+                power = np.zeros(self.block_size // 2 + 1)
+                if frames * (self.block_size // 2 + 1) * channels * 16 <= self.max_frame_bytes:
+                    if self.frame_spectra is None:
+                        self.frame_spectra = self.stft_filter.analyze(self.signal)
+                    filtered_audio = self.stft_filter.synthesize(self.frame_spectra, len(self.signal), power=power)
+                    if np.ndim(self.signal) == 1:
+                        filtered_audio = filtered_audio[:, 0]
+                else:
+                    blocks = (self.signal[start:start + 262144] for start in range(0, len(self.signal), 262144))
+                    filtered_audio = np.concatenate(
+                        [np.zeros((0,) + self.signal.shape[1:])] + list(self.stft_filter.process(blocks, power))
+                    )
+                return filtered_audio, self.stft_filter.freqs, self.stft_filter.power_magnitudes(power)
+
+            if self.spectrum is None:
+                self.spectrum = backend.rfft(self.signal)
+                self.power_spectrum = np.abs(self.spectrum) ** 2
+            gain = self.power_spectrum / (self.power_spectrum + alpha * self.noise_power)
+            filtered_fft = gain * self.spectrum
+            filtered_audio = backend.irfft(filtered_fft, len(self.signal))
+            return filtered_audio, self.freqs, spectrum_magnitudes(filtered_fft)
@@ -0,0 +1,46 @@
+import numpy as np
+from scipy import fft as sp_fft
+
+
+class FftBackend:
+    """Real FFTs on scipy.fft, multithreaded and padded to a fast length.
+
+    Whole-signal transforms are zero-padded to `next_fast_len` (lengths with large
+    prime factors are many times slower than 2^a 3^b 5^c ... ones) and inverse
+    transforms are cropped back to the signal, so a spectrum belongs to the
+    padded length `fast_length(n)`. Signals are (N,) or (N, C) and are transformed
+    along axis 0, every channel in one call. scipy keeps plans for recently used
+    lengths and zero-pads internally, so no padded copy is held between calls.
+    """
+
+    def __init__(self, workers=-1, pad=True):
+        self.workers = workers
+        self.pad = pad
+
+    def fast_length(self, n):
+        """Transform length used for a signal of `n` samples."""
+        return sp_fft.next_fast_len(n, real=True) if self.pad and n else n
+
+    def rfftfreq(self, n, d=1.0):
+        return sp_fft.rfftfreq(self.fast_length(n), d)
+
+    def rfft(self, signal):
+        """Spectrum along axis 0 of a signal zero-padded to `fast_length(len(signal))`."""
+        signal = np.asarray(signal)
+        if signal.dtype not in (np.float32, np.float64):
+            signal = signal.astype(np.float64)
+        return sp_fft.rfft(signal, self.fast_length(len(signal)), axis=0, workers=self.workers)
+
+    def irfft(self, spectrum, length):
+        """Inverse of `rfft` for a signal of `length` samples (padding cropped off)."""
+        return sp_fft.irfft(spectrum, self.fast_length(length), axis=0, workers=self.workers)[:length]
+
+    def rfft_frames(self, frames, axis=-1):
+        """Spectra of equal-length frames along `axis` (no padding)."""
+        return sp_fft.rfft(frames, axis=axis, workers=self.workers)
+
+    def irfft_frames(self, spectra, frame_length, axis=-1):
+        return sp_fft.irfft(spectra, frame_length, axis=axis, workers=self.workers)
+
+
+backend = FftBackend()
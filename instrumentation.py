@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+# Log-spaced millisecond bin edges of the span histograms: 0.01 ms to 10 s, four bins per decade.
+HISTOGRAM_EDGES = np.logspace(-2, 4, 25)
+
+
+class _Span:
+    __slots__ = ("instrumentation", "name", "start")
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class Instrumentation:
+    """Named timing spans around the hot paths, with histograms and a trace export.
+
+    `with instruments.span("fft"): ...` records how long the block took. While
+    disabled, `span` hands back one shared no-op context manager, so instrumented
+    code pays a method call and nothing else. Durations are kept per name for
+    histograms and summaries; the most recent `max_events` spans are kept as
+    events for a Chrome trace (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, enabled=False, max_events=100_000):
+        self.enabled = enabled
+        self.durations = defaultdict(lambda: deque(maxlen=max_events))
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.durations.clear()
+            self.counters.clear()
+            self.gauges.clear()
+            self.events.clear()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def count(self, name, amount=1):
+        """Bump a named counter (cache hits, dropped frames, ...)."""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += amount
+
+    def gauge(self, name, value):
+        """Set a named current value (cache hit rate, bytes in use, ...)."""
+        if self.enabled:
+            self.gauges[name] = value
+
+    def record(self, name, start, duration):
+        with self._lock:
+            self.durations[name].append(duration)
+            self.events.append((name, start, duration, threading.get_ident()))
+
+    def histogram(self, name, bins=None):
+        """Counts of `name`'s durations over log-spaced millisecond bins: (counts, edges)."""
+        bins = HISTOGRAM_EDGES if bins is None else bins
+        with self._lock:
+            durations = np.array(self.durations.get(name, ())) * 1000
+        return np.histogram(durations, bins)
+
+    def summary(self):
+        """Per-span count, mean/p50/p95/max in milliseconds and histogram counts over
+        HISTOGRAM_EDGES, plus counters and gauges."""
+        with self._lock:
+            snapshot = {name: np.array(values) * 1000 for name, values in self.durations.items() if values}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        spans = {
+            name: {
+                "count": len(values),
+                "mean": float(values.mean()),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(values.max()),
+                "histogram": np.histogram(values, HISTOGRAM_EDGES)[0].tolist(),
+            }
+            for name, values in sorted(snapshot.items())
+        }
+        return {
+            "spans": spans,
+            "histogram_edges": HISTOGRAM_EDGES.tolist(),
+            "counters": counters,
+            "gauges": gauges,
+        }
+
+    def export_trace(self, path):
+        """Write the recorded spans as Chrome trace-event JSON."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+        trace = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": thread,
+            }
+            for name, start, duration, thread in events
+        ]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": trace, "summary": self.summary()}, file)
+
+
+instruments = Instrumentation(enabled=bool(os.environ.get("SIGNAL_EQUALIZER_TRACE")))
+span = instruments.span
@@ -1,34 +1,55 @@
 import csv
+import logging
+import os
 import sys
-import tempfile
 import numpy as np
-import pandas as pd
-import soundfile as sf
-from scipy.io import wavfile
-from scipy.signal import spectrogram
 from matplotlib import pyplot as plt
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from PyQt5 import QtGui, QtCore
-from PyQt5.QtCore import QUrl, QTimer, Qt
-from PyQt5.QtGui import QPen, QColor
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
+from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtGui import QPen, QColor, QKeySequence
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, QRadioButton, QPushButton,
     QComboBox, QFileDialog, QHBoxLayout, QFrame, QSlider, QLabel, QSizePolicy,
-    QSpacerItem, QButtonGroup, QLineEdit, QGraphicsScene, QGraphicsLineItem
+    QSpacerItem, QButtonGroup, QLineEdit, QCheckBox, QGraphicsScene, QGraphicsLineItem, QShortcut
 )
 import pyqtgraph as pg
 
+from cache import OutputCache, SidecarCache
+from engine import (
+    MODE_BANDS, BandTable, EqualizerEngine, NoiseStatistics, WienerFilter, mode_bands, slider_gain
+)
+from fft_backend import backend
+from instrumentation import instruments, span
+from playback import PcmPlayer
+from signal_source import ArraySource, SignalSource, load_csv
+from spectrogram import SpectrogramView, StftTileCache
+from waveform import CineRenderer, WaveformPyramid, spectrum_pyramid
+from workers import EqualizerWorker
+
+logger = logging.getLogger(__name__)
+
+# SIGNAL_EQUALIZER_DTYPE=float32 processes signals in single precision (half the memory).
+DTYPE = np.dtype(os.environ.get("SIGNAL_EQUALIZER_DTYPE", "float64"))
+
+# SIGNAL_EQUALIZER_CSV_RATE sets the sample rate of CSV signals instead of inferring it from the time column.
+CSV_RATE = float(os.environ["SIGNAL_EQUALIZER_CSV_RATE"]) if os.environ.get("SIGNAL_EQUALIZER_CSV_RATE") else None
+
+# Analysis arrays of opened files are kept here for instant reopening; set it empty to disable.
+SIDECAR_DIR = os.environ.get(
+    "SIGNAL_EQUALIZER_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "signal_equalizer")
+)
+
 
 class SignalProcessingWithWienerFilter:
-    def __init__(self, plot_widget, audio_data, sample_rate, main_app, alpha=1.0):
+    def __init__(self, plot_widget, audio_data, sample_rate, main_app, alpha=1.0, stats=None):
         """ Initialize signal processing with Wiener filter. """
         self.plot_widget = plot_widget
         self.audio_data = audio_data
         self.sample_rate = sample_rate
         self.main_app = main_app
         self.alpha = alpha
+        self.wiener = WienerFilter()
+        self.wiener.load(self.audio_data, self.sample_rate, stats)
         duration = len(self.audio_data) / self.sample_rate
 
         self.noise_data = None
@@ -41,7 +62,6 @@ class SignalProcessingWithWienerFilter:
         self.pen = QPen(Qt.red)
         self.pen.setWidthF(duration / 1000)
 
-        print("Class initialized with red lines")
         self.start_line = self.create_line(self.start_index)
         self.end_line = self.create_line(self.end_index)
 
@@ -56,14 +76,14 @@ class SignalProcessingWithWienerFilter:
 
     def create_line(self, x_pos):
         line = pg.InfiniteLine(pos=x_pos, angle=90, pen=self.pen, movable=True)
-        print(f"Line created at position: {x_pos}")
+        logger.debug("Line created at position: %s", x_pos)
         return line
 
     def remove_lines(self):
         self.view_box.removeItem(self.start_line)
         self.view_box.removeItem(self.end_line)
         self.remove_blue_region()
-        print("Red lines and blue region removed")
+        logger.debug("Red lines and blue region removed")
 
     def create_blue_region(self):
         """Create or update the faint blue region between the red lines."""
@@ -75,26 +95,27 @@ class SignalProcessingWithWienerFilter:
                 movable=False,
             )
             self.view_box.addItem(self.blue_region)
-            print(f"Blue region created between: {self.start_index} and {self.end_index}")
+            logger.debug("Blue region created between: %s and %s", self.start_index, self.end_index)
         else:
 
             self.blue_region.setRegion((self.start_index, self.end_index))
-            print(f"Blue region updated to: {self.start_index} and {self.end_index}")
+            logger.debug("Blue region updated to: %s and %s", self.start_index, self.end_index)
 
     def remove_blue_region(self):
         """Remove the blue region if it exists."""
         if self.blue_region is not None:
             self.view_box.removeItem(self.blue_region)
             self.blue_region = None
-            print("Blue region removed")
+            logger.debug("Blue region removed")
 
     def handle_start_move(self):
         new_pos = self.start_line.getPos()[0]
         if abs(new_pos - self.last_start_pos) > 0.001:
             self.start_index = new_pos
             self.last_start_pos = new_pos
-            print(f"Start line moved to position: {self.start_index}")
+            logger.debug("Start line moved to position: %s", self.start_index)
             self.create_blue_region()
+            self.update_live_noise_power()
 
     def handle_end_move(self):
         """Update end index when the end line moves."""
@@ -102,55 +123,48 @@ class SignalProcessingWithWienerFilter:
         if abs(new_pos - self.last_end_pos) > 0.001:
             self.end_index = new_pos
             self.last_end_pos = new_pos
-            print(f"End line moved to position: {self.end_index}")
+            logger.debug("End line moved to position: %s", self.end_index)
             self.create_blue_region()
+            self.update_live_noise_power()
+
+    def update_live_noise_power(self):
+        """Report the dragged region's noise power, read from the prefix sums in O(1)."""
+        start_idx = int(self.start_index * self.sample_rate)
+        end_idx = int(self.end_index * self.sample_rate)
+        self.main_app.show_noise_power(self.wiener.stats.variance(start_idx, end_idx))
 
     def select_noise_range(self):
-        """Extract noise data from the selected range."""
-        if self.audio_data is not None:
-            start_idx = int(self.start_index * self.sample_rate)
-            end_idx = int(self.end_index * self.sample_rate)
-            noise_data = self.audio_data[start_idx:end_idx]
-            print(f"Noise range selected: {start_idx} to {end_idx}")
-            return noise_data
+        """Sample indices of the selected noise range."""
+        start_idx = int(self.start_index * self.sample_rate)
+        end_idx = int(self.end_index * self.sample_rate)
+        logger.debug("Noise range selected: %d to %d", start_idx, end_idx)
+        return start_idx, end_idx
 
     def estimate_noise_power(self):
-        noise_data = self.select_noise_range()
-        if noise_data is not None and len(noise_data) > 0:
-            noise_power = np.var(noise_data)
-            print(f"Noise power estimated: {noise_power}")
+        noise_power = self.wiener.set_noise_range(*self.select_noise_range())
+        if noise_power > 0:
+            logger.debug("Noise power estimated: %s", noise_power)
         else:
-            print("No noise data selected yet.")
-            noise_power = 0
+            logger.info("No noise data selected yet.")
         return noise_power
 
     def apply_wiener_filter(self):
         """Apply a custom Wiener filter with an adjustable alpha."""
         self.create_blue_region()
-        noise_power_spectrum = self.estimate_noise_power()
         if self.audio_data is not None:
+            noise_power_spectrum = self.estimate_noise_power()
             if noise_power_spectrum > 0:
-                print(f"Applying Wiener filter with noise power: {noise_power_spectrum}")
-
-                audio_fft = np.fft.fft(self.audio_data)
-                power_spectrum_signal = np.abs(audio_fft) ** 2
-                wiener_filter = power_spectrum_signal / (power_spectrum_signal + self.alpha * noise_power_spectrum)
+                logger.debug("Applying Wiener filter with noise power: %s", noise_power_spectrum)
 
-                filtered_fft = wiener_filter * audio_fft
-
-                filtered_audio = np.fft.ifft(filtered_fft).real
+                filtered_audio, positive_freqs, magnitudes = self.wiener.apply(self.alpha)
 
                 self.main_app.plot_output(filtered_audio)
-
-                fft_freq = np.fft.fftfreq(len(filtered_fft), 1 / self.sample_rate)
-                positive_freqs = fft_freq[: len(fft_freq) // 2]
-                magnitudes = np.abs(filtered_fft[: len(filtered_fft) // 2])
-                self.main_app.freq_plot_item.setData(positive_freqs, magnitudes)
+                self.main_app.show_magnitudes(magnitudes, spectrum_pyramid(magnitudes, positive_freqs))
 
             else:
-                print("Noise power not estimated. Please select a noise range first.")
+                logger.warning("Noise power not estimated. Please select a noise range first.")
         else:
-            print("No audio data available to filter.")
+            logger.warning("No audio data available to filter.")
 
 
 class SignalViewer(QWidget):
@@ -159,28 +173,99 @@ class SignalViewer(QWidget):
 
         self.layout = QVBoxLayout()
         self.plot_widget = pg.PlotWidget()
-        self.media_player = QMediaPlayer()
+        self.media_player = PcmPlayer(self)
         self.needle = pg.InfiniteLine(pos=0, angle=90, movable=False, pen="cyan")
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_needle)
         self.plot_item = self.plot_widget.plot(pen=pg.mkPen(color="gray"))
-        self.audio_data = None
+        self.source = None
+        self._audio_data = None
+        self.pyramid = None
+        self.sidecar = None
+        self.sidecar_key = None
         self.sample_rate = 0
+        self.channel = 0
         self.cine_mode = False
         self.current_position = 0
+        self.plot_widget.getViewBox().sigXRangeChanged.connect(self.refresh_waveform)
+        self.cine = CineRenderer(self.plot_item)
 
         self.layout.addWidget(self.plot_widget)
         self.setLayout(self.layout)
 
+    @property
+    def audio_data(self):
+        """Full signal of the displayed channel, read from the source on first use."""
+        if self._audio_data is None and self.source is not None:
+            self._audio_data = self.source.to_array()
+        return self._audio_data
+
+    @audio_data.setter
+    def audio_data(self, data):
+        """Show an (N,) or (N, C) signal through the current channel selection."""
+        self._audio_data = None
+        self.source = None if data is None else ArraySource(data, self.sample_rate, self.channel)
+        self.pyramid = None
+        self.sidecar_key = None
+
+    @property
+    def signal(self):
+        """Every channel of the source as (N, C), or (N,) for a mono source."""
+        if self.source is None:
+            return None
+        return self.source.to_frames() if self.source.channels > 1 else self.audio_data
+
+    def set_channel(self, channel):
+        """Display another channel, or the "mid" / "side" overview; playback keeps every channel."""
+        self.channel = channel
+        if self.source is None:
+            return
+        self.source = self.source.with_channel(channel)
+        self._audio_data = None
+        self.pyramid = None
+        if self.cine_mode:
+            self.cine.reset()
+        else:
+            self.set_waveform()
+
+    def set_waveform(self, pyramid=None):
+        """Draw the whole signal from `pyramid`, or from the current source's pyramid."""
+        self.pyramid = pyramid if pyramid is not None else self.build_pyramid()
+        self.plot_widget.setXRange(0, self.source.duration)
+        self.refresh_waveform()
+
+    def build_pyramid(self):
+        """Waveform pyramid of the current source, from the sidecar cache when the file has an entry."""
+        if self.sidecar is None or self.sidecar_key is None:
+            return WaveformPyramid(self.source)
+        packed = self.sidecar.fetch(
+            self.sidecar_key, f"pyramid_{self.channel}_{DTYPE.name}", lambda: WaveformPyramid(self.source).packed
+        )
+        return WaveformPyramid(self.source, packed=packed)
+
+    def refresh_waveform(self):
+        """Redraw the visible range from the pyramid level matching the plot width."""
+        if self.cine_mode or self.pyramid is None:
+            return
+        view_box = self.plot_widget.getViewBox()
+        start_time, end_time = view_box.viewRange()[0]
+        width = int(view_box.width()) or 1000
+        with span("waveform_plot"):
+            self.plot_item.setPos(0, 0)
+            self.plot_item.setData(*self.pyramid.view(start_time, end_time, width))
+
     def load_waveform(self, file_path):
-        self.audio_data, self.sample_rate = sf.read(file_path, always_2d=False)
-        self.audio_data = self.audio_data[:,
-                          0] if self.audio_data.ndim > 1 else self.audio_data
+        self.load_source(SignalSource(file_path, dtype=DTYPE))
+
+    def load_source(self, source):
+        self.channel = "mid" if source.channels > 1 else 0
+        self.source = source.with_channel(self.channel)
+        self.sample_rate = self.source.sample_rate
+        self.media_player.set_source(self.source)
+        self._audio_data = None
+        self.pyramid = None
         if not self.cine_mode:
-            duration = len(self.audio_data) / self.sample_rate
-            x = np.linspace(0, duration, len(self.audio_data))
-            self.plot_item.setData(x, self.audio_data)
-            self.plot_widget.setXRange(x[0], x[-1])
+            self.set_waveform()
             self.plot_widget.addItem(self.needle)
         else:
             self.plot_item.setData([], [])
@@ -190,17 +275,19 @@ class SignalViewer(QWidget):
         self.timer.start(35)
         if self.cine_mode:
             self.current_position = 0
+            self.cine.reset()
             self.plot_widget.setXRange(0, 5)
             self.plot_item.setData([], [])
         else:
-            duration = len(self.audio_data) / self.sample_rate
-            x = np.linspace(0, duration, len(self.audio_data))
-            self.plot_item.setData(x, self.audio_data)
-            self.plot_widget.setXRange(x[0], x[-1])
+            if self.pyramid is None:
+                self.set_waveform()
+            else:
+                self.plot_widget.setXRange(0, self.source.duration)
+                self.refresh_waveform()
             self.plot_widget.addItem(self.needle)
 
     def update_needle(self):
-        if self.media_player.state() == QMediaPlayer.State.PlayingState:
+        if self.media_player.is_playing():
             position = self.media_player.position() / 1000.0
             if self.cine_mode:
                 self.update_cine_mode(position)
@@ -208,14 +295,7 @@ class SignalViewer(QWidget):
                 self.needle.setPos(position)
 
     def update_cine_mode(self, position):
-        window_size = 3
-        start_time = max(0, position - window_size)
-        end_time = position
-        start_index = int(start_time * self.sample_rate * 2)
-        end_index = int(end_time * self.sample_rate * 2)
-        y = self.audio_data[start_index:end_index]
-        x = np.linspace(start_time, end_time, end_index - start_index)
-        self.plot_item.setData(x, y)
+        self.cine.render(self.source, position)
         self.update_x_axis(position)
 
     def update_x_axis(self, position):
@@ -236,8 +316,7 @@ class SignalViewer(QWidget):
 
     def forward_audio(self):
         current_position = self.media_player.position()
-        duration = len(self.audio_data) / self.sample_rate
-        print(duration)
+        duration = self.source.duration
         new_position = int(current_position + (100 * duration))
         self.media_player.setPosition(new_position)
 
@@ -249,7 +328,7 @@ class SignalViewer(QWidget):
 
     def backward_audio(self):
         current_position = self.media_player.position()
-        duration = len(self.audio_data) / self.sample_rate
+        duration = self.source.duration
         new_position = int(max(0, current_position - 100 * duration))
         self.media_player.setPosition(new_position)
 
@@ -260,6 +339,50 @@ class SignalViewer(QWidget):
             self.needle.setPos(new_position / 1000.0)
 
 
+class InstrumentationOverlay(QLabel):
+    """Translucent panel listing span latencies (count, p50, p95, max in ms) and their
+    histograms as sparklines over 0.01 ms to 10 s."""
+
+    BARS = " ▁▂▃▄▅▆▇█"
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setStyleSheet("background: rgba(0, 0, 0, 170); color: #9f9; font-family: monospace; padding: 6px;")
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self.timer.stop()
+            self.hide()
+            return
+        instruments.enable()
+        self.refresh()
+        self.show()
+        self.raise_()
+        self.timer.start(500)
+
+    def refresh(self):
+        summary = instruments.summary()
+        lines = [f"{'span':18s} {'n':>6s} {'p50':>8s} {'p95':>8s} {'max':>8s}  {'0.01ms':<12s}{'10s':>12s}"]
+        for name, stats in summary["spans"].items():
+            lines.append(
+                f"{name:18s} {stats['count']:6d} {stats['p50']:8.2f} {stats['p95']:8.2f} {stats['max']:8.2f}  "
+                f"{self.sparkline(stats['histogram'])}"
+            )
+        lines += [f"{name:18s} {value:6d}" for name, value in summary["counters"].items()]
+        lines += [f"{name:22s} {value:10.3g}" for name, value in summary["gauges"].items()]
+        self.setText("\n".join(lines))
+        self.adjustSize()
+
+    def sparkline(self, counts):
+        """One bar per histogram bin, scaled to the fullest bin."""
+        peak = max(counts) or 1
+        return "".join(self.BARS[-(-count * (len(self.BARS) - 1) // peak)] for count in counts)
+
+
 class MainApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -268,9 +391,19 @@ class MainApp(QMainWindow):
         self.isCSV = False
         self.audio_data = None
         self.original_magnitudes = None
+        self.modified_magnitudes = None
+        self.spectrum_pyramid = None
+        self.spectrogram_bands = None
+        self.output_spectrogram_gains = None
         self.positive_freqs = None
         self.fft_freq = None
         self.ftt_data = None
+        self.engine = EqualizerEngine(dtype=DTYPE)
+        self.output_cache = OutputCache()
+        self.sidecar = SidecarCache(SIDECAR_DIR) if SIDECAR_DIR else None
+        self.sidecar_key = None
+        self.equalizer_worker = EqualizerWorker(self.engine, self.output_cache, self)
+        self.equalizer_worker.result_ready.connect(self.handle_equalizer_result)
         self.setWindowTitle("Simple Signal Viewer")
         self.setGeometry(50, 50, 600, 1000)
 
@@ -341,6 +474,7 @@ class MainApp(QMainWindow):
         self.left_frame.setLayout(self.left_layout)
 
         self.input_viewer = SignalViewer()
+        self.input_viewer.sidecar = self.sidecar
 
         self.output_viewer = SignalViewer()
 
@@ -408,8 +542,8 @@ class MainApp(QMainWindow):
         self.rewind_button.clicked.connect(self.rewind_audio)
         self.forward_button.clicked.connect(self.forward_audio)
         self.backward_button.clicked.connect(self.backward_audio)
-        self.linear_scale_button.toggled.connect(self.update_frequency_graph)
-        self.audiogram_scale_button.toggled.connect(self.update_frequency_graph)
+        self.linear_scale_button.toggled.connect(self.refresh_frequency_plot)
+        self.audiogram_scale_button.toggled.connect(self.refresh_frequency_plot)
 
         dummy_H = QHBoxLayout()
 
@@ -489,6 +623,7 @@ class MainApp(QMainWindow):
 
         self.freq_plot_widget = pg.PlotWidget()
         self.freq_plot_item = self.freq_plot_widget.plot(pen=pg.mkPen(color="blue"))
+        self.freq_plot_widget.getViewBox().sigXRangeChanged.connect(self.refresh_frequency_plot)
         self.freq_layout.addWidget(self.freq_plot_widget)
         self.right_layout.addWidget(self.freq_frame)
 
@@ -500,27 +635,13 @@ class MainApp(QMainWindow):
 
         self.update_sliders()
 
-        self.spec_plot_figure_1 = Figure()
-        self.spec_plot_figure_2 = Figure()
-        self.spec_canvas_1 = FigureCanvas(self.spec_plot_figure_1)
-        self.spec_canvas_1.setFixedSize(500, 230)
-        self.spec_canvas_2 = FigureCanvas(self.spec_plot_figure_2)
-        self.spec_canvas_2.setFixedSize(500, 230)
-        axis1 = self.spec_plot_figure_1.add_subplot(111)
-        axis1.set_title("Signal Spectrogram")
-        axis1.set_xlabel("Time [s]")
-        axis1.set_ylabel("Frequency [Hz] (scaled to '$\pi$')")
-        cbar1 = self.spec_canvas_1.figure.colorbar(mappable=None, ax=axis1)
-        cbar1.set_label("Magnitude [dB]")
-
-        axis2 = self.spec_plot_figure_2.add_subplot(111)
-        axis2.set_title("Reconstructed Signal Spectrogram")
-        axis2.set_xlabel("Time [s]")
-        axis2.set_ylabel("Frequency [Hz] (scaled to '$\pi$')")
-        cbar2 = self.spec_canvas_2.figure.colorbar(mappable=None, ax=axis2)
-        cbar2.set_label("Magnitude [dB]")
-        self.spectrogram_layout.addWidget(self.spec_canvas_1)
-        self.spectrogram_layout.addWidget(self.spec_canvas_2)
+        self.stft_cache = StftTileCache(sidecar=self.sidecar)
+        self.input_spectrogram = SpectrogramView("Signal Spectrogram", self.stft_cache)
+        self.input_spectrogram.setFixedSize(500, 230)
+        self.output_spectrogram = SpectrogramView("Reconstructed Signal Spectrogram", self.stft_cache)
+        self.output_spectrogram.setFixedSize(500, 230)
+        self.spectrogram_layout.addWidget(self.input_spectrogram)
+        self.spectrogram_layout.addWidget(self.output_spectrogram)
 
         self.combo_box = QComboBox()
         self.combo_box.setObjectName("combo_box")
@@ -533,6 +654,11 @@ class MainApp(QMainWindow):
 
         self.combo_box.currentIndexChanged.connect(self.change_mode)
 
+        self.channel_combo = QComboBox()
+        self.channel_combo.setObjectName("channel_combo")
+        self.channel_combo.setEnabled(False)
+        self.channel_combo.currentIndexChanged.connect(self.change_channel)
+
         self.input_radio_button = QRadioButton("Input")
         self.output_radio_button = QRadioButton("Output")
         self.input_radio_button.setChecked(True)
@@ -551,6 +677,14 @@ class MainApp(QMainWindow):
         self.alpha_slider.setVisible(False)
         self.alpha_label.setVisible(False)
 
+        self.noise_power_label = QLabel("Noise power: -")
+        self.noise_power_label.setVisible(False)
+        self.live_preview_checkbox = QCheckBox("Live preview")
+        self.live_preview_checkbox.setVisible(False)
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.timeout.connect(self.apply_wiener_filter)
+
         self.wiener_filter_button = QPushButton("Apply Wiener Filter")
         self.wiener_filter_button.setObjectName("wiener_filter_button")
         self.wiener_filter_button.setVisible(False)
@@ -561,6 +695,7 @@ class MainApp(QMainWindow):
         self.io_button_group.addButton(self.output_radio_button)
 
         control_layout_right.addWidget(self.combo_box)
+        control_layout_right.addWidget(self.channel_combo)
         control_layout_right.addWidget(self.linear_scale_button)
         control_layout_right.addWidget(self.audiogram_scale_button)
         control_layout_right.addWidget(control_frame_center)
@@ -569,6 +704,8 @@ class MainApp(QMainWindow):
         control_layout_right.addWidget(self.show_hide_button)
         control_layout_right.addWidget(self.alpha_label)
         control_layout_right.addWidget(self.alpha_slider)
+        control_layout_right.addWidget(self.noise_power_label)
+        control_layout_right.addWidget(self.live_preview_checkbox)
 
         control_layout_right.addWidget(self.wiener_filter_button)
 
@@ -584,6 +721,10 @@ class MainApp(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
+        self.overlay = InstrumentationOverlay(self)
+        self.overlay.move(10, 10)
+        QShortcut(QKeySequence("F12"), self, self.overlay.toggle)
+
     def change_plot_mode(self):
         if self.normal_mode_button.isChecked():
             self.input_viewer.cine_mode = False
@@ -599,193 +740,98 @@ class MainApp(QMainWindow):
             self.output_viewer.plot_widget.removeItem(self.output_viewer.needle)
             self.input_viewer.play_audio()
             self.output_viewer.play_audio()
-        print('cine_mode:', self.input_viewer.cine_mode)
+        logger.debug("cine_mode: %s", self.input_viewer.cine_mode)
+
+    def update_channel_combo(self):
+        """List the input's channels, with mid/side overviews for multichannel files."""
+        channels = self.input_viewer.source.channels
+        self.channel_combo.blockSignals(True)
+        self.channel_combo.clear()
+        if channels > 1:
+            self.channel_combo.addItem("Mid (L+R)/2", "mid")
+            self.channel_combo.addItem("Side (L-R)/2", "side")
+        for channel in range(channels):
+            self.channel_combo.addItem(f"Channel {channel + 1}", channel)
+        self.channel_combo.setEnabled(channels > 1)
+        self.channel_combo.blockSignals(False)
+
+    def change_channel(self, index):
+        channel = self.channel_combo.itemData(index)
+        if channel is None or self.input_viewer.source is None:
+            return
+        self.input_viewer.set_channel(channel)
+        self.output_viewer.set_channel(channel)
+        if self.isShown:
+            self.plot_spectrogram(self.input_viewer.source, self.input_spectrogram)
+            self.plot_output_spectrogram()
 
     def show_hide_spectrogram(self):
         if not self.isShown:
             self.show_hide_button.setText("Hide spectrogram")
 
-            if self.input_viewer.audio_data is not None and self.audio_data is not None:
-                self.plot_spectrogram(
-                    self.input_viewer.audio_data,
-                    self.input_viewer.sample_rate,
-                    self.spec_canvas_1,
-                    self.spec_plot_figure_1.gca(),
-                )
-                self.plot_spectrogram(
-                    self.audio_data,
-                    self.input_viewer.sample_rate,
-                    self.spec_canvas_2,
-                    self.spec_plot_figure_2.gca(),
-                )
+            if self.input_viewer.source is not None and self.output_viewer.source is not None:
+                self.plot_spectrogram(self.input_viewer.source, self.input_spectrogram)
+                self.plot_output_spectrogram()
             self.spectrogram_frame.show()
         else:
             self.show_hide_button.setText("Show spectrogram")
             self.spectrogram_frame.hide()
         self.isShown = not self.isShown
 
-    def create_sliders(self, slider_num):
+    def create_sliders(self):
         slider_layouts = []
         self.sliders = []
-        if self.input_viewer.audio_data is not None:
-            min_label, max_label = self.update_frequency_graph()
-        else:
-            min_label, max_label = 0, 0
+        if self.input_viewer.source is not None:
+            self.update_frequency_graph()
 
         if self.current_mode == "Uniform Mode":
-            for i in range(slider_num):
+            freq_labels = [""] * 10
+            if self.input_viewer.source is not None:
+                self.freq_ranges = self.engine.uniform_bands(10)
+            else:
+                self.freq_ranges = [(0, 0)] * 10
+        elif self.current_mode in MODE_BANDS:
+            freq_labels, self.freq_ranges = mode_bands(self.current_mode, self.input_viewer.sample_rate)
+        else:
+            freq_labels, self.freq_ranges = [], []
+
+        if self.input_viewer.source is not None:
+            self.equalizer_worker.sync()
+            self.engine.set_bands(self.freq_ranges)
+            self.spectrogram_bands = BandTable(
+                self.stft_cache.frequencies(self.input_viewer.sample_rate), self.freq_ranges
+            )
+
+        for i, (min_freq, max_freq) in enumerate(self.freq_ranges):
+            slider_container = QVBoxLayout()
 
-                slider_container = QVBoxLayout()
+            slider = QSlider(Qt.Orientation.Vertical)
+            slider.setMinimum(0)
+            slider.setMaximum(10)
+            slider.setValue(5)
+            slider.setTickPosition(QSlider.TicksBothSides)
+            slider.setTickInterval(1)
+
+            if self.current_mode == "Uniform Mode":
                 slider_container.setAlignment(
                     Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop
                 )
-
-                slider = QSlider(Qt.Orientation.Vertical)
-                slider.setMinimum(0)
-                slider.setMaximum(10)
-                slider.setValue(5)
-                slider.setTickPosition(QSlider.TicksBothSides)
-                slider.setTickInterval(1)
-
-                if i == 0:
-                    label = QLabel(f" ({min_label:.1f}, {max_label * (i + 1):.1f}) Hz")
-                else:
-                    label = QLabel(
-                        f" ({max_label * i:.1f}, {max_label * (i + 1):.1f}) Hz"
-                    )
-
-                label.setAlignment(Qt.AlignLeft)
+                label = QLabel(f" ({min_freq:.1f}, {max_freq:.1f}) Hz")
                 label.setObjectName("slider_label")
                 label.setMaximumWidth(200)
-
-                slider_container.addWidget(slider)
-                slider_container.addWidget(label)
-
-                slider_layouts.append(slider_container)
-                self.sliders.append(slider)
-                slider.valueChanged.connect(
-                    lambda value, index=i: self.update_frequency_graph(index)
-                )
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-        elif self.current_mode == "Musical Mode":
-
-            freq_labels = ["Drums", "Violin", "OOOh", "R", "S", "Xylophone"]
-            freq_ranges = [(0, 400), (400, 4000), (200, 800), (1320, 4400), (2200, 13500), (4000, 20000)]
-
-            for i in range(slider_num):
-                slider_container = QVBoxLayout()
-
-                slider = QSlider(Qt.Orientation.Vertical)
-                slider.setMinimum(0)
-                slider.setMaximum(10)
-                slider.setValue(5)
-                slider.setTickPosition(QSlider.TicksBothSides)
-                slider.setTickInterval(1)
-
-                label = QLabel(
-                    f"{freq_labels[i]} ({freq_ranges[i][0]:.1f}, {freq_ranges[i][1]:.1f})"
-                )
-                label.setAlignment(Qt.AlignLeft)
-                label.setMaximumWidth(140)
-                slider_container.addWidget(slider)
-                slider_container.addWidget(label)
-
-                slider_layouts.append(slider_container)
-                self.sliders.append(slider)
-                slider.valueChanged.connect(
-                    lambda value, index=i: self.update_frequency_graph(index)
-                )
-
-        elif self.current_mode == "Animal Song Mode":
-
-            freq_labels = ["Trumpet", "Whale", "Piano", "Frog", "Cardinal", "Xylophone"]
-            freq_ranges = [[0, 600], [600, 1200], [1200, 1600], [1600, 2800], [2800, 3600], [4000, 20000]]
-
-            for i in range(slider_num):
-                slider_container = QVBoxLayout()
-
-                slider = QSlider(Qt.Orientation.Vertical)
-                slider.setMinimum(0)
-                slider.setMaximum(10)
-                slider.setValue(5)
-                slider.setTickPosition(QSlider.TicksBothSides)
-                slider.setTickInterval(1)
-
-                label = QLabel(
-                    f"{freq_labels[i]} ({freq_ranges[i][0]:.1f}, {freq_ranges[i][1]:.1f})"
-                )
-                label.setAlignment(Qt.AlignLeft)
+            else:
+                label = QLabel(f"{freq_labels[i]} ({min_freq:.1f}, {max_freq:.1f})")
                 label.setMaximumWidth(140)
-                slider_container.addWidget(slider)
-                slider_container.addWidget(label)
-
-                slider_layouts.append(slider_container)
-                self.sliders.append(slider)
-                slider.valueChanged.connect(
-                    lambda value, index=i: self.update_frequency_graph(index)
-                )
-        elif self.current_mode == "ECG Abnormalities Mode":
-
-            freq_labels = ["Normal", "AFib", "VT", "VC"]
-            freq_ranges = [0, 22000], [200, 450], [80, 864], [0, 1000]
-
-            for i in range(slider_num):
-                slider_container = QVBoxLayout()
+            label.setAlignment(Qt.AlignLeft)
 
-                slider = QSlider(Qt.Orientation.Vertical)
-                slider.setMinimum(0)
-                slider.setMaximum(10)
-                slider.setValue(5)
-                slider.setTickPosition(QSlider.TicksBothSides)
-                slider.setTickInterval(1)
+            slider_container.addWidget(slider)
+            slider_container.addWidget(label)
 
-                label = QLabel(
-                    f"{freq_labels[i]} ({freq_ranges[i][0]:.1f}, {freq_ranges[i][1]:.1f})"
-                )
-                label.setAlignment(Qt.AlignLeft)
-                label.setMaximumWidth(140)
-                slider_container.addWidget(slider)
-                slider_container.addWidget(label)
-
-                slider_layouts.append(slider_container)
-                self.sliders.append(slider)
-                slider.valueChanged.connect(
-                    lambda value, index=i: self.update_frequency_graph(index)
-                )
+            slider_layouts.append(slider_container)
+            self.sliders.append(slider)
+            slider.valueChanged.connect(
+                lambda value, index=i: self.update_frequency_graph(index)
+            )
         return slider_layouts
 
     def change_mode(self, index):
@@ -798,13 +844,18 @@ class MainApp(QMainWindow):
             self.wiener_filter_button.setVisible(True)
             self.alpha_slider.setVisible(True)
             self.alpha_label.setVisible(True)
+            self.noise_power_label.setVisible(True)
+            self.live_preview_checkbox.setVisible(True)
             self.signal_processor = SignalProcessingWithWienerFilter(self.input_viewer.plot_widget,
-                                                                     self.input_viewer.audio_data,
-                                                                     self.input_viewer.sample_rate, self)
+                                                                     self.input_viewer.signal,
+                                                                     self.input_viewer.sample_rate, self,
+                                                                     stats=self.noise_statistics())
 
         else:
             self.alpha_slider.setVisible(False)
             self.alpha_label.setVisible(False)
+            self.noise_power_label.setVisible(False)
+            self.live_preview_checkbox.setVisible(False)
             self.wiener_filter_button.setVisible(False)
             if hasattr(self, 'signal_processor'):
                 self.signal_processor.remove_lines()
@@ -823,13 +874,7 @@ class MainApp(QMainWindow):
                         widget.deleteLater()
                 self.slider_layout.removeItem(widget_to_remove)
 
-        if self.current_mode == "Uniform Mode" or self.current_mode == "Custom Range Mode":
-            slider_num = 10
-        elif self.current_mode == "Musical Mode":
-            slider_num = 6
-        else:
-            slider_num = 6
-        slider_layouts = self.create_sliders(slider_num)
+        slider_layouts = self.create_sliders()
         for slider_layout in slider_layouts:
             self.slider_layout.addLayout(slider_layout)
 
@@ -844,105 +889,100 @@ class MainApp(QMainWindow):
         )
 
         if file_path:
-            self.reset_viewers()
-            if file_path.endswith(".csv"):
-                self.isCSV = True
-                wav_file_path = self.convert_csv_to_wav(file_path)
-                self.input_viewer.load_waveform(wav_file_path)
-                self.input_viewer.media_player.setMedia(
-                    QMediaContent(QUrl.fromLocalFile(wav_file_path))
-                )
-            elif file_path.endswith(".wav"):
-                self.isCSV = False
-                self.input_viewer.load_waveform(file_path)
-                self.input_viewer.media_player.setMedia(
-                    QMediaContent(QUrl.fromLocalFile(file_path))
-                )
-
-            (
-                self.ftt_data,
-                self.fft_freq,
-                self.positive_freqs,
-                self.original_magnitudes,
-            ) = self.fft()
-
-            if not self.cine_mode_button.isChecked():
-                self.output_viewer.plot_widget.addItem(self.output_viewer.needle)
-                self.input_viewer.plot_widget.addItem(self.input_viewer.needle)
-
-            self.update_sliders()
-            self.update_frequency_graph()
-            self.reset_sliders()
-
-            if self.input_viewer.audio_data is not None:
-                self.plot_output(self.input_viewer.audio_data)
-                if self.isShown:
-                    self.plot_spectrogram(
-                        self.input_viewer.audio_data,
-                        self.input_viewer.sample_rate,
-                        self.spec_canvas_1,
-                        self.spec_plot_figure_1.gca(),
-                    )
-            self.play_audio()
-            self.change_mode(self.combo_box.currentIndex())
-            return (
-                self.ftt_data,
-                self.fft_freq,
-                self.positive_freqs,
-                self.original_magnitudes,
-            )
-
-    def convert_csv_to_wav(self, file_path, sample_rate=44100):
-        data = pd.read_csv(file_path, header=None)
-
-        if data.shape[1] == 2:
+            return self.open_file(file_path)
+
+    def open_file(self, file_path):
+        self.reset_viewers()
+        self.output_cache.clear()
+        self.sidecar_key = self.sidecar.key(file_path) if self.sidecar is not None else None
+        self.input_viewer.sidecar_key = self.sidecar_key
+        if file_path.endswith(".csv"):
+            self.isCSV = True
+            self.input_viewer.load_source(load_csv(file_path, sample_rate=CSV_RATE, dtype=DTYPE))
+        elif file_path.endswith(".wav"):
+            self.isCSV = False
+            self.input_viewer.load_waveform(file_path)
+        self.update_channel_combo()
+
+        (
+            self.ftt_data,
+            self.fft_freq,
+            self.positive_freqs,
+            self.original_magnitudes,
+        ) = self.fft()
 
-            samples = data.iloc[:, 1].values
-        else:
-            samples = data.values.flatten()
+        if not self.cine_mode_button.isChecked():
+            self.output_viewer.plot_widget.addItem(self.output_viewer.needle)
+            self.input_viewer.plot_widget.addItem(self.input_viewer.needle)
 
-        samples = samples / np.max(np.abs(samples)) * 32767
-        samples = samples.astype(np.int16)
+        self.update_sliders()
+        self.update_frequency_graph()
+        self.reset_sliders()
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            wav_file = temp_file.name
-        wavfile.write(wav_file, sample_rate, samples)
-        return wav_file
+        if self.input_viewer.source is not None:
+            self.plot_output(self.input_viewer.signal)
+            if self.isShown:
+                self.plot_spectrogram(self.input_viewer.source, self.input_spectrogram)
+        self.play_audio()
+        self.change_mode(self.combo_box.currentIndex())
+        return (
+            self.ftt_data,
+            self.fft_freq,
+            self.positive_freqs,
+            self.original_magnitudes,
+        )
 
-    def plot_output(self, output_data):
-        self.output_viewer.audio_data = output_data
+    def plot_output(self, output_data, spectrogram_gains=None, pyramid=None):
+        """Show a new output; with per-row `spectrogram_gains` its spectrogram is derived
+        from the input's instead of recomputed (exact recompute otherwise, e.g. Wiener).
+        A waveform `pyramid` built off the GUI thread is drawn as is when it is for the
+        displayed channel."""
+        self.output_spectrogram_gains = spectrogram_gains
         self.output_viewer.sample_rate = self.input_viewer.sample_rate
+        self.output_viewer.channel = self.input_viewer.channel
+        self.output_viewer.audio_data = output_data
 
         if self.cine_mode_button.isChecked():
             self.output_viewer.cine_mode = True
             self.output_viewer.plot_item.setData([], [])
         else:
             self.output_viewer.cine_mode = False
-            duration = len(output_data) / self.input_viewer.sample_rate
-            x = np.linspace(0, duration, len(output_data))
-            self.output_viewer.plot_item.setData(x, output_data)
-            self.output_viewer.plot_widget.setXRange(x[0], x[-1])
+            if output_data is self.input_viewer.signal:
+                pyramid = self.input_viewer.pyramid
+            elif pyramid is not None and pyramid.source.channel != self.output_viewer.channel:
+                pyramid = None
+            self.output_viewer.set_waveform(pyramid)
             self.output_viewer.plot_widget.addItem(self.output_viewer.needle)
 
-        self.output_viewer.media_player.stop()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            output_file_path = temp_file.name
-            sf.write(output_file_path, output_data, self.input_viewer.sample_rate)
-
-        self.output_viewer.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(output_file_path)))
+        self.output_viewer.media_player.set_source(self.output_viewer.source, keep_position=True)
 
         if self.isShown:
-            self.plot_spectrogram(
-                output_data, self.input_viewer.sample_rate, self.spec_canvas_2, self.spec_plot_figure_2.gca()
-            )
+            self.plot_output_spectrogram()
+
+    def plot_output_spectrogram(self):
+        if self.output_spectrogram_gains is not None:
+            self.output_spectrogram.set_derived(self.input_viewer.source, self.output_spectrogram_gains)
+        else:
+            self.plot_spectrogram(self.output_viewer.source, self.output_spectrogram)
 
     def fft(self):
-        self.ftt_data = np.fft.fft(self.input_viewer.audio_data)
-        self.fft_freq = np.fft.fftfreq(
-            len(self.ftt_data), 1 / self.input_viewer.sample_rate
-        )
-        self.positive_freqs = self.fft_freq[: len(self.fft_freq) // 2]
-        self.original_magnitudes = np.abs(self.ftt_data[: len(self.ftt_data) // 2])
+        self.equalizer_worker.sync()
+        signal = self.input_viewer.signal
+        spectrum = magnitudes = None
+        if self.sidecar_key is not None:
+            tag = f"{DTYPE.name}_{backend.fast_length(len(signal))}"
+            spectrum = self.sidecar.load(self.sidecar_key, f"spectrum_{tag}")
+            magnitudes = self.sidecar.load(self.sidecar_key, f"magnitudes_{tag}")
+        self.engine.load(signal, self.input_viewer.sample_rate, spectrum, magnitudes)
+        if self.sidecar_key is not None:
+            if spectrum is None:
+                self.sidecar.save(self.sidecar_key, f"spectrum_{tag}", self.engine.spectrum)
+            if magnitudes is None:
+                self.sidecar.save(self.sidecar_key, f"magnitudes_{tag}", self.engine.original_magnitudes)
+        self.ftt_data = self.engine.spectrum
+        self.fft_freq = self.engine.freqs
+        self.positive_freqs = self.engine.positive_freqs
+        self.original_magnitudes = self.engine.original_magnitudes
         return (
             self.ftt_data,
             self.fft_freq,
@@ -951,113 +991,83 @@ class MainApp(QMainWindow):
         )
 
     def update_frequency_graph(self, index=None):
-        if self.input_viewer.audio_data is not None:
-            if not hasattr(self, "original_magnitudes") or index is None:
-                if not hasattr(self, "ftt_data") or not hasattr(self, "fft_freq"):
-                    (
-                        self.ftt_data,
-                        self.fft_freq,
-                        self.positive_freqs,
-                        self.original_magnitudes,
-                    ) = self.fft()
-                self.modified_magnitudes = self.original_magnitudes.copy()
-                self.slider_label_min = self.positive_freqs[0]
-                self.slider_label_max = (self.positive_freqs[-1] - self.positive_freqs[0]) / 10
-
-            if index is not None:
-                slider = self.sliders[index]
-                labels = slider.parent().findChildren(QLabel)
-                label_text = labels[index].text()
-                freq_range_text = label_text.split("(")[-1].strip(") Hz")
-                min_freq, max_freq = map(float, freq_range_text.split(","))
-                if self.audiogram_scale_button.isChecked():
-                    magnitudes_db = 20 * np.log10(self.modified_magnitudes)
-                    self.freq_plot_item.setData(self.positive_freqs, magnitudes_db)
-                    self.freq_plot_widget.getPlotItem().invertY(True)
-                    self.freq_plot_widget.setLabel("left", "H L (dB)")
-                else:
-                    self.freq_plot_item.setData(
-                        self.positive_freqs, self.modified_magnitudes
-                    )
-                    self.freq_plot_widget.getPlotItem().invertY(False)
-                    self.freq_plot_widget.setLabel("left", "Magnitude")
-
-                if slider.value() != 0:
-                    gain = 1 + (slider.value() - 5) * 0.2
-                    freq_range = np.where(
-                        (self.positive_freqs >= min_freq)
-                        & (self.positive_freqs < max_freq)
-                    )[0]
-
-                    self.modified_magnitudes[freq_range] = (
-                            self.original_magnitudes[freq_range] * gain
-                    )
-
-                    temp_ftt_data = self.ftt_data.copy()
-                    half_len = len(temp_ftt_data) // 2
-                    temp_ftt_data[:half_len] = self.modified_magnitudes * np.exp(
-                        1j * np.angle(temp_ftt_data[:half_len])
-                    )
-
-                    if len(temp_ftt_data) % 2 == 0:
-                        temp_ftt_data[half_len + 1:] = np.conj(temp_ftt_data[1:half_len][::-1])
-                    else:
-                        temp_ftt_data[half_len + 1:] = np.conj(temp_ftt_data[1:half_len + 1][::-1])
-
-                    reconstructed_signal = np.fft.ifft(temp_ftt_data).real
-                    self.plot_output(reconstructed_signal)
-
-                else:
-
-                    freq_range = np.where(
-                        (self.positive_freqs >= min_freq)
-                        & (self.positive_freqs < max_freq)
-                    )[0]
-                    self.modified_magnitudes[freq_range] = 0
-
-                    temp_ftt_data = self.ftt_data.copy()
-                    half_len = len(temp_ftt_data) // 2
-                    temp_ftt_data[:half_len] = self.modified_magnitudes * np.exp(
-                        1j * np.angle(temp_ftt_data[:half_len])
-                    )
-
-                    if len(temp_ftt_data) % 2 == 0:
-                        temp_ftt_data[half_len + 1:] = np.conj(temp_ftt_data[1:half_len][::-1])
-                    else:
-                        temp_ftt_data[half_len + 1:] = np.conj(temp_ftt_data[1:half_len + 1][::-1])
-
-                    reconstructed_signal = np.fft.ifft(temp_ftt_data).real
-                    self.plot_output(reconstructed_signal)
-
-            self.freq_plot_item.setData(self.positive_freqs, self.modified_magnitudes)
-
-            return self.slider_label_min, self.slider_label_max
-
-    def plot_spectrogram(self, amplitude, sample_rate, figure, axis):
-        axis.clear()
-        frequencies, times, amplitudes = spectrogram(amplitude, sample_rate)
-        frequencies = frequencies * np.pi / np.max(frequencies)
-        axis.pcolormesh(
-            times, frequencies, 10 * np.log10(amplitudes + 1e-10), shading="gouraud"
+        if self.input_viewer.source is not None:
+            if index is None:
+                self.equalizer_worker.sync()
+                if self.engine.spectrum is None:
+                    self.fft()
+                self.engine.reset_gains()
+                magnitudes = self.engine.modified_magnitudes
+                self.show_magnitudes(magnitudes, spectrum_pyramid(magnitudes, self.positive_freqs))
+            else:
+                self.equalizer_worker.submit(
+                    [slider_gain(slider.value()) for slider in self.sliders], self.input_viewer.channel
+                )
+
+    def handle_equalizer_result(self, generation, output, magnitudes, band_gains, pyramid, spectrum):
+        if generation != self.equalizer_worker.generation:
+            return
+        self.show_magnitudes(magnitudes, spectrum)
+        self.plot_output(output, self.spectrogram_bands.gain_vector(band_gains), pyramid)
+
+    def show_magnitudes(self, magnitudes, pyramid):
+        """Plot a magnitude spectrum from its min/max `pyramid`; a new spectrum length resets the zoom."""
+        previous, self.spectrum_pyramid = self.spectrum_pyramid, pyramid
+        self.modified_magnitudes = magnitudes
+        if previous is None or previous.length != pyramid.length:
+            self.freq_plot_widget.setXRange(0, pyramid.duration, padding=0)
+        self.refresh_frequency_plot()
+
+    def refresh_frequency_plot(self):
+        """Redraw the visible frequency range from the pyramid level matching the plot width."""
+        if self.spectrum_pyramid is None:
+            return
+        view_box = self.freq_plot_widget.getViewBox()
+        start_freq, end_freq = view_box.viewRange()[0]
+        width = int(view_box.width()) or 1000
+        with span("frequency_plot"):
+            freqs, magnitudes = self.spectrum_pyramid.view(start_freq, end_freq, width)
+            if self.audiogram_scale_button.isChecked():
+                magnitudes_db = 20 * np.log10(np.maximum(magnitudes, 1e-12))
+                self.freq_plot_item.setData(freqs, magnitudes_db)
+                self.freq_plot_widget.getPlotItem().invertY(True)
+                self.freq_plot_widget.setLabel("left", "H L (dB)")
+            else:
+                self.freq_plot_item.setData(freqs, magnitudes)
+                self.freq_plot_widget.getPlotItem().invertY(False)
+                self.freq_plot_widget.setLabel("left", "Magnitude")
+
+    def plot_spectrogram(self, source, view):
+        if source is self.input_viewer.source:
+            self.stft_cache.persist(
+                self.stft_cache.key_for(source), self.sidecar_key, f"stft_{self.input_viewer.channel}_{DTYPE.name}"
+            )
+        view.set_signal(source)
+
+    def noise_statistics(self):
+        """Prefix sums for the Wiener noise estimate, from the sidecar cache when the file has an entry."""
+        signal = self.input_viewer.signal
+        if self.sidecar is None:
+            return NoiseStatistics(signal)
+        prefix_sums = self.sidecar.fetch(
+            self.sidecar_key, f"noise_prefix_sums_{DTYPE.name}", lambda: NoiseStatistics(signal).prefix_sums
         )
-        figure.draw()
+        return NoiseStatistics(signal, prefix_sums)
 
     def clear_spectrogram(self):
-        if hasattr(self, 'spec_canvas_1') and self.spec_canvas_1:
-            self.spec_canvas_1.figure.clf()
-        if hasattr(self, 'spec_canvas_2') and self.spec_canvas_2:
-            self.spec_canvas_2.figure.clf()
-            self.spec_canvas_2.draw()
+        self.input_spectrogram.clear_signal()
+        self.output_spectrogram.clear_signal()
 
     def reset_viewers(self):
         self.input_viewer.plot_item.clear()
         self.output_viewer.plot_item.clear()
-        self.input_viewer.media_player.stop()
-        self.output_viewer.media_player.stop()
+        self.input_viewer.media_player.set_source(None)
+        self.output_viewer.media_player.set_source(None)
         self.input_viewer.needle.setPos(0)
         self.output_viewer.needle.setPos(0)
         self.input_viewer.audio_data = None
         self.output_viewer.audio_data = None
+        self.spectrum_pyramid = None
 
     def reset_sliders(self):
         for slider in self.sliders:
@@ -1105,13 +1115,19 @@ class MainApp(QMainWindow):
     def apply_wiener_filter(self):
         self.signal_processor.apply_wiener_filter()
 
+    def show_noise_power(self, noise_power):
+        self.noise_power_label.setText(f"Noise power: {noise_power:.3g}")
+        if self.live_preview_checkbox.isChecked() and not self.preview_timer.isActive():
+            self.preview_timer.start(200)
+
     def update_alpha(self):
-        new_alpha = self.alpha_slider.value()
-        self.signal_processor.alpha = new_alpha
-        self.signal_processor.apply_wiener_filter()
+        """Take the new alpha; slider ticks arriving within 50 ms share one filtering pass."""
+        self.signal_processor.alpha = self.alpha_slider.value()
+        if not self.preview_timer.isActive():
+            self.preview_timer.start(50)
 
     def plot_difference(self):
-        if self.input_viewer.audio_data is not None and self.output_viewer.audio_data is not None:
+        if self.input_viewer.source is not None and self.output_viewer.source is not None:
             input_data = self.input_viewer.audio_data
             output_data = self.output_viewer.audio_data
 
@@ -1132,10 +1148,15 @@ class MainApp(QMainWindow):
 
 
 def main():
+    logging.basicConfig(level=os.environ.get("SIGNAL_EQUALIZER_LOG", "WARNING"))
     app = QApplication(sys.argv)
     window = MainApp()
     window.show()
-    sys.exit(app.exec_())
+    status = app.exec_()
+    trace_path = os.environ.get("SIGNAL_EQUALIZER_TRACE")
+    if trace_path:
+        instruments.export_trace(trace_path)
+    sys.exit(status)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+from fractions import Fraction
+
+import numpy as np
+from PyQt5.QtCore import QIODevice, QObject
+from PyQt5.QtMultimedia import QAudio, QAudioDeviceInfo, QAudioFormat, QAudioOutput
+from scipy.signal import resample_poly
+
+
+class ResampledSource:
+    """Every channel of `source` resampled to `sample_rate`, computed window by window.
+
+    Each `read_frames` call runs a polyphase filter over just the input frames the
+    window needs plus the filter's reach on either side, starting on a multiple of
+    the decimation factor so the output lines up with resampling the whole signal
+    at once. Swapping sources therefore costs nothing up front; the work follows
+    the audio device's pull rate.
+    """
+
+    def __init__(self, source, sample_rate):
+        ratio = Fraction(sample_rate / source.sample_rate).limit_denominator(1000)
+        self.source = source
+        self.sample_rate = sample_rate
+        self.channels = source.channels
+        self.up, self.down = ratio.numerator, ratio.denominator
+        self.margin = -(-10 * max(self.up, self.down) // self.up) + 1
+        self.length = -(-len(source) * self.up // self.down)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def duration(self):
+        return self.length / self.sample_rate
+
+    def read_frames(self, start, stop):
+        """Return resampled frames [start, stop) of every channel as an (n, C) array."""
+        start, stop = max(0, int(start)), min(self.length, int(stop))
+        if stop <= start:
+            return np.zeros((0, self.channels))
+        first = max(0, start * self.down // self.up - self.margin)
+        first -= first % self.down
+        last = min(len(self.source), -(-stop * self.down // self.up) + self.margin)
+        window = resample_poly(self.source.read_frames(first, last), self.up, self.down, axis=0)
+        offset = first * self.up // self.down
+        return window[start - offset:stop - offset]
+
+
+class PcmDevice(QIODevice):
+    """Pull-mode QIODevice that converts source windows to interleaved 16-bit PCM on demand."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source = None
+        self.frame = 0
+        self.channels = 1
+
+    def isSequential(self):
+        return True
+
+    def frames_left(self):
+        return 0 if self.source is None else max(0, len(self.source) - self.frame)
+
+    def bytesAvailable(self):
+        return 2 * self.channels * self.frames_left() + super().bytesAvailable()
+
+    def readData(self, max_size):
+        count = min(max_size // (2 * self.channels), self.frames_left())
+        if count <= 0:
+            return b""
+        window = self.source.read_frames(self.frame, self.frame + count)
+        self.frame += len(window)
+        return (np.clip(window, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+    def writeData(self, data):
+        return -1
+
+
+class PcmPlayer(QObject):
+    """In-memory replacement for QMediaPlayer fed straight from a signal source.
+
+    Samples are pulled from the source as the audio device asks for them, so
+    loading a file or swapping in a newly equalized output needs no temporary
+    WAV file, and a swap keeps the current play position. Every channel of the
+    source is played, whichever one the viewer shows. Sources at a rate the output
+    device cannot play (e.g. 360 Hz ECG) are resampled to the nearest one as they
+    are pulled.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.device = PcmDevice(self)
+        self.device.open(QIODevice.ReadOnly)
+        self.output = None
+        self.source_rate = 0
+        self.sample_rate = 0
+        self.playing = False
+
+    def set_source(self, source, keep_position=False):
+        """Play from `source`; with `keep_position` the swap happens mid-playback."""
+        if source is None or source.sample_rate != self.source_rate or source.channels != self.device.channels:
+            self.stop()
+            if self.output is not None:
+                self.output.deleteLater()
+                self.output = None
+            self.source_rate = self.sample_rate = 0
+            if source is not None:
+                self._create_output(source.sample_rate, source.channels)
+        if source is not None and source.sample_rate != self.sample_rate:
+            source = ResampledSource(source, self.sample_rate)
+        self.device.source = source
+        if not keep_position:
+            self.device.frame = 0
+        elif source is not None:
+            self.device.frame = min(self.device.frame, len(source))
+
+    def _create_output(self, sample_rate, channels):
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(int(sample_rate))
+        audio_format.setChannelCount(channels)
+        audio_format.setSampleSize(16)
+        audio_format.setCodec("audio/pcm")
+        audio_format.setByteOrder(QAudioFormat.LittleEndian)
+        audio_format.setSampleType(QAudioFormat.SignedInt)
+        device = QAudioDeviceInfo.defaultOutputDevice()
+        if not device.isNull() and not device.isFormatSupported(audio_format):
+            audio_format.setSampleRate(device.nearestFormat(audio_format).sampleRate())
+        self.output = QAudioOutput(audio_format, self)
+        self.output.stateChanged.connect(self._handle_state_changed)
+        self.source_rate = sample_rate
+        self.sample_rate = audio_format.sampleRate()
+        self.device.channels = channels
+
+    def _handle_state_changed(self, state):
+        if state == QAudio.IdleState and self.device.frames_left() == 0:
+            self.output.stop()
+            self.playing = False
+
+    def is_playing(self):
+        return self.playing
+
+    def play(self):
+        if self.output is None:
+            return
+        if self.output.state() == QAudio.SuspendedState:
+            self.output.resume()
+        elif self.output.state() != QAudio.ActiveState:
+            if self.device.frames_left() == 0:
+                self.device.frame = 0
+            self.output.start(self.device)
+        self.playing = True
+
+    def pause(self):
+        if self.output is not None and self.output.state() == QAudio.ActiveState:
+            self.output.suspend()
+        self.playing = False
+
+    def stop(self):
+        if self.output is not None:
+            self.output.stop()
+        self.device.frame = 0
+        self.playing = False
+
+    def position(self):
+        """Current play position in milliseconds."""
+        if not self.sample_rate:
+            return 0
+        frame = self.device.frame
+        if self.output is not None and self.output.state() != QAudio.StoppedState:
+            frame -= max(0, self.output.bufferSize() - self.output.bytesFree()) // (2 * self.device.channels)
+        return int(max(0, frame) * 1000 / self.sample_rate)
+
+    def setPosition(self, position):
+        """Seek to `position` milliseconds, dropping audio already buffered."""
+        if self.device.source is None:
+            return
+        self.device.frame = min(len(self.device.source), max(0, int(position * self.sample_rate / 1000)))
+        if self.output is None:
+            return
+        if self.output.state() in (QAudio.ActiveState, QAudio.IdleState):
+            self.output.stop()
+            self.output.start(self.device)
+        elif self.output.state() == QAudio.SuspendedState:
+            self.output.stop()
@@ -0,0 +1,271 @@
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+import soundfile as sf
+from scipy.io import wavfile
+
+try:
+    from pyarrow import csv as arrow_csv
+except ImportError:
+    arrow_csv = None
+
+
+def select_channel(frames, channel):
+    """One channel of an (n, C) window, or its mid ("mid") or side ("side") signal."""
+    if channel == "mid":
+        return frames.mean(axis=1)
+    if channel == "side":
+        if frames.shape[1] < 2:
+            return np.zeros(len(frames), frames.dtype)
+        return (frames[:, 0] - frames[:, 1]) / 2
+    return frames[:, channel]
+
+
+class ArraySource:
+    def __init__(self, data, sample_rate, channel=0):
+        """ Signal source over an in-memory (N,) or (N, C) array (CSV input, processed output).
+
+        `read` returns the selected `channel` (an index, "mid" or "side") and
+        `read_frames` every channel. Float32 data is read back as float32, anything
+        else as float64.
+        """
+        self.data = np.asarray(data)
+        self.sample_rate = sample_rate
+        self.channel = channel
+        self.channels = 1 if self.data.ndim == 1 else self.data.shape[1]
+        self.dtype = np.dtype(np.float32 if self.data.dtype == np.float32 else np.float64)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def duration(self):
+        return len(self) / self.sample_rate if self.sample_rate else 0
+
+    def with_channel(self, channel):
+        """The same signal viewed through another channel selection."""
+        return ArraySource(self.data, self.sample_rate, channel)
+
+    def read(self, start, stop):
+        """Return samples [start, stop) of the selected channel as `dtype`, clipped to the signal."""
+        if self.data.ndim == 1:
+            start, stop = max(0, int(start)), min(len(self), int(stop))
+            return np.asarray(self.data[start:max(start, stop)], dtype=self.dtype)
+        return select_channel(self.read_frames(start, stop), self.channel)
+
+    def read_frames(self, start, stop):
+        """Return frames [start, stop) of every channel as an (n, C) `dtype` array."""
+        start, stop = max(0, int(start)), min(len(self), int(stop))
+        window = np.asarray(self.data[start:max(start, stop)], dtype=self.dtype)
+        return window[:, None] if window.ndim == 1 else window
+
+    def blocks(self, block_size=262144):
+        """Yield consecutive `dtype` blocks of the selected channel covering the whole signal."""
+        for start in range(0, len(self), block_size):
+            yield self.read(start, start + block_size)
+
+    def frame_blocks(self, block_size=262144):
+        """Yield consecutive (n, C) blocks of every channel covering the whole signal."""
+        for start in range(0, len(self), block_size):
+            yield self.read_frames(start, start + block_size)
+
+    def to_array(self):
+        return self.read(0, len(self))
+
+    def to_frames(self):
+        return self.read_frames(0, len(self))
+
+
+class SignalSource(ArraySource):
+    """Lazy view of a sound file: length, sample rate and random-access windows.
+
+    PCM WAV files are memory-mapped, so a window read only touches its own pages;
+    other formats fall back to seeking soundfile reads. Nothing is decoded until a
+    window is requested. Windows come back as `dtype` (float64 or float32).
+    """
+
+    def __init__(self, file_path, channel=0, dtype=np.float64):
+        self.file_path = file_path
+        self.channel = channel
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._array = None
+        self._frames = None
+        self._pcm = None
+        self._scale = 1.0
+        self._offset = 0.0
+        self._sound_file = None
+
+        info = sf.info(file_path)
+        self.sample_rate = info.samplerate
+        self.channels = info.channels
+        self.frames = info.frames
+
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", wavfile.WavFileWarning)
+                _, pcm = wavfile.read(file_path, mmap=True)
+        except (ValueError, TypeError, NotImplementedError):
+            pcm = None
+        if pcm is not None:
+            self._pcm = pcm if pcm.ndim > 1 else pcm[:, None]
+            if pcm.dtype == np.uint8:
+                self._scale, self._offset = 1 / 128, -128.0
+            elif np.issubdtype(pcm.dtype, np.integer):
+                self._scale = 1 / (2 ** (8 * pcm.dtype.itemsize - 1))
+            self.frames = len(self._pcm)
+
+    def __len__(self):
+        return self.frames
+
+    @property
+    def data(self):
+        return self.to_array()
+
+    def with_channel(self, channel):
+        """The same file viewed through another channel selection, sharing decoded frames."""
+        source = SignalSource(self.file_path, channel, self.dtype)
+        source._frames = self._frames
+        return source
+
+    def _scaled(self, pcm):
+        window = pcm.astype(self.dtype)
+        if self._offset:
+            window += self._offset
+        if self._scale != 1.0:
+            window *= self._scale
+        return window
+
+    def read(self, start, stop):
+        """Return samples [start, stop) of the selected channel as `dtype`."""
+        start, stop = max(0, int(start)), min(self.frames, int(stop))
+        if stop <= start:
+            return np.zeros(0, dtype=self.dtype)
+        if self._array is not None:
+            return self._array[start:stop]
+        if self._pcm is not None and not isinstance(self.channel, str):
+            return self._scaled(self._pcm[start:stop, self.channel])
+        return select_channel(self.read_frames(start, stop), self.channel)
+
+    def read_frames(self, start, stop):
+        """Return frames [start, stop) of every channel as an (n, C) `dtype` array."""
+        start, stop = max(0, int(start)), min(self.frames, int(stop))
+        if stop <= start:
+            return np.zeros((0, self.channels), dtype=self.dtype)
+        if self._frames is not None:
+            return self._frames[start:stop]
+        if self._pcm is not None:
+            return self._scaled(self._pcm[start:stop])
+        with self._lock:
+            if self._sound_file is None:
+                self._sound_file = sf.SoundFile(self.file_path)
+            self._sound_file.seek(start)
+            return self._sound_file.read(stop - start, dtype=self.dtype.name, always_2d=True)
+
+    def to_array(self):
+        """Materialize the selected channel once; later reads are served from it."""
+        if self._array is None:
+            if self._frames is not None:
+                self._array = select_channel(self._frames, self.channel)
+            else:
+                self._array = np.concatenate(list(self.blocks())) if self.frames else np.zeros(0, dtype=self.dtype)
+        return self._array
+
+    def to_frames(self):
+        """Materialize every channel once as an (N, C) array."""
+        if self._frames is None:
+            self._frames = (
+                np.concatenate(list(self.frame_blocks())) if self.frames
+                else np.zeros((0, self.channels), dtype=self.dtype)
+            )
+        return self._frames
+
+    def close(self):
+        if self._sound_file is not None:
+            self._sound_file.close()
+            self._sound_file = None
+
+
+def _has_header(file_path):
+    with open(file_path) as file:
+        first = file.readline().strip()
+    try:
+        [float(field) for field in first.split(",") if field.strip()]
+    except ValueError:
+        return True
+    return False
+
+
+def read_csv_columns(file_path, chunk_size=1_000_000):
+    """Parse a numeric CSV into a float64 (rows, columns) array.
+
+    pyarrow's multithreaded reader is used when it is installed; otherwise pandas'
+    C parser reads the file in chunks of `chunk_size` rows.
+    """
+    skip_rows = 1 if _has_header(file_path) else 0
+    if arrow_csv is not None:
+        table = arrow_csv.read_csv(
+            file_path,
+            read_options=arrow_csv.ReadOptions(skip_rows=skip_rows, autogenerate_column_names=True),
+        )
+        return np.column_stack([column.to_numpy().astype(np.float64) for column in table.columns])
+    chunks = pd.read_csv(
+        file_path, header=None, skiprows=skip_rows, dtype=np.float64, engine="c", chunksize=chunk_size
+    )
+    return np.concatenate([chunk.to_numpy() for chunk in chunks])
+
+
+def csv_sample_rate(times, default=44100):
+    """Sample rate implied by a CSV time column.
+
+    A column of consecutive integers is a sample index and carries no rate. Steps
+    of a millisecond or more are taken to be milliseconds (the ECG exports use
+    2.778 ms steps), smaller ones seconds. Steps are averaged because the exported
+    times are rounded, skipping gaps left by cut-out segments.
+
+    The unit cannot be told from the numbers alone: a sensor logging in seconds
+    once per second or slower (2 s steps) reads as milliseconds, i.e. a 1000x too
+    high rate (500 Hz). Pass the rate explicitly (`load_csv(sample_rate=...)`,
+    `batch.py --csv-rate`, SIGNAL_EQUALIZER_CSV_RATE) for such files.
+    """
+    if len(times) < 2:
+        return default
+    steps = np.diff(times)
+    median = np.median(steps)
+    step = steps[np.abs(steps - median) <= 0.5 * abs(median)].mean() if median > 0 else 0
+    if step <= 0 or (step == 1 and np.all(times == np.round(times))):
+        return default
+    if step >= 1:
+        step /= 1000
+    rate = round(1 / step, 3)
+    return int(rate) if rate.is_integer() else rate
+
+
+def load_csv(file_path, sample_rate=None, default_rate=44100, dtype=np.float64):
+    """Read a one-column (samples) or two-column (time, samples) CSV, peak-normalized.
+
+    The sample rate comes from `sample_rate`, else the time column (see
+    `csv_sample_rate` for how its unit is guessed), else `default_rate`.
+    """
+    data = read_csv_columns(file_path)
+    if data.shape[1] >= 2:
+        samples = data[:, 1]
+        if sample_rate is None:
+            sample_rate = csv_sample_rate(data[:, 0], default_rate)
+    else:
+        samples = data[:, 0]
+    if sample_rate is None:
+        sample_rate = default_rate
+
+    peak = np.max(np.abs(samples)) if len(samples) else 0
+    return ArraySource((samples / peak if peak else samples).astype(dtype), sample_rate)
+
+
+def open_source(file_path, dtype=np.float64, csv_rate=None):
+    """Signal source for a WAV (or other soundfile format) or CSV file; `csv_rate`
+    overrides the rate inferred from a CSV's time column."""
+    if file_path.lower().endswith(".csv"):
+        return load_csv(file_path, sample_rate=csv_rate, dtype=dtype)
+    return SignalSource(file_path, dtype=dtype)
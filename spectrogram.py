@@ -0,0 +1,229 @@
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QRectF
+from scipy.signal import spectrogram
+
+from instrumentation import instruments, span
+from workers import CancellableJobRunner
+
+
+class StftTileCache:
+    """LRU cache of STFT power tiles keyed by (signal identity, tile index).
+
+    A tile holds `tile_frames` consecutive spectrogram columns, so a file is
+    analysed once and pan/zoom only computes tiles that were never visible. With
+    a `sidecar` cache, tiles of signals registered through `persist` are also
+    kept on disk and survive a reopen.
+    """
+
+    def __init__(self, nperseg=256, tile_frames=256, max_bytes=256 * 2 ** 20, sidecar=None):
+        self.nperseg = nperseg
+        self.noverlap = nperseg // 8
+        self.hop = nperseg - self.noverlap
+        self.tile_frames = tile_frames
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._keys = weakref.WeakKeyDictionary()
+        self._counter = itertools.count()
+        self.sidecar = sidecar
+        self._stored = {}
+
+    def key_for(self, source):
+        """Stable cache key for a source object, never reused for another one."""
+        key = self._keys.get(source)
+        if key is None:
+            key = self._keys[source] = next(self._counter)
+        return key
+
+    def persist(self, key, sidecar_key, name):
+        """Store `key`'s tiles as artifacts `<name>_<nperseg>_<tile_frames>_<index>` of a sidecar entry."""
+        if self.sidecar is not None and sidecar_key is not None:
+            self._stored[key] = (sidecar_key, f"{name}_{self.nperseg}_{self.tile_frames}")
+
+    def frame_count(self, source):
+        return max(0, (len(source) - self.noverlap) // self.hop)
+
+    def frequencies(self, sample_rate):
+        return np.fft.rfftfreq(self.nperseg, 1 / sample_rate)
+
+    def tile(self, key, source, index):
+        """Power of frames [index * tile_frames, ...) as a (freqs, frames) float32 array."""
+        with self._lock:
+            tile = self.tiles.get((key, index))
+            if tile is not None:
+                self.tiles.move_to_end((key, index))
+                instruments.count("stft_tile_hit")
+                return tile
+
+        instruments.count("stft_tile_miss")
+        stored = self._stored.get(key)
+        tile = None if stored is None else self.sidecar.load(stored[0], f"{stored[1]}_{index}")
+        if tile is None:
+            with span("spectrogram_tile"):
+                first = index * self.tile_frames
+                last = min(first + self.tile_frames, self.frame_count(source))
+                segment = source.read(first * self.hop, (last - 1) * self.hop + self.nperseg)
+                _, _, power = spectrogram(segment, source.sample_rate, nperseg=self.nperseg, noverlap=self.noverlap)
+                tile = power.astype(np.float32)
+            if stored is not None:
+                self.sidecar.save(stored[0], f"{stored[1]}_{index}", tile)
+
+        with self._lock:
+            if (key, index) in self.tiles:
+                return self.tiles[(key, index)]
+            self.tiles[(key, index)] = tile
+            self.bytes += tile.nbytes
+            while self.bytes > self.max_bytes and len(self.tiles) > 1:
+                _, evicted = self.tiles.popitem(last=False)
+                self.bytes -= evicted.nbytes
+        return tile
+
+    def forget(self, key):
+        with self._lock:
+            for tile_key in [tile_key for tile_key in self.tiles if tile_key[0] == key]:
+                self.bytes -= self.tiles.pop(tile_key).nbytes
+            self._stored.pop(key, None)
+
+    def visible_power(self, key, source, start_time, end_time, width, token=None):
+        """Gather the tiles between two times, max-pooled to about `width` columns.
+
+        Returns (power, first frame, frame step, source), or None when `token` is
+        cancelled part way through.
+        """
+        first = max(0, int(start_time * source.sample_rate / self.hop))
+        last = min(self.frame_count(source), int(np.ceil(end_time * source.sample_rate / self.hop)) + 1)
+        if last <= first:
+            return None
+
+        first_tile, last_tile = first // self.tile_frames, (last - 1) // self.tile_frames
+        tiles = []
+        for index in range(first_tile, last_tile + 1):
+            if token is not None and token.cancelled:
+                return None
+            tiles.append(self.tile(key, source, index))
+        offset = first_tile * self.tile_frames
+        power = np.concatenate(tiles, axis=1)[:, first - offset:last - offset]
+
+        step = max(1, power.shape[1] // max(1, width))
+        if step > 1:
+            columns = power.shape[1] // step * step
+            power = power[:, :columns].reshape(power.shape[0], -1, step).max(axis=2)
+        return power, first, step, source
+
+
+class SpectrogramView(pg.PlotWidget):
+    """Spectrogram drawn with an ImageItem and a lookup-table colormap.
+
+    Only the tiles inside the visible time range are gathered, max-pooled down to
+    about one column per pixel and converted to dB on each pan or zoom. Levels
+    follow the unscaled tiles so derived views stay comparable to their input.
+    """
+
+    def __init__(self, title, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache if cache is not None else StftTileCache()
+        self.source = None
+        self.key = None
+        self.owns_key = False
+        self.row_power = None
+        self.base_power = None
+        self.base_source = None
+        self.image_db = None
+        self.levels = None
+        self.first = 0
+        self.step = 1
+        self.setTitle(title)
+        self.setLabel("bottom", "Time [s]")
+        self.setLabel("left", "Frequency [Hz]")
+        self.image = pg.ImageItem()
+        self.image.setLookupTable(pg.colormap.get("viridis").getLookupTable(nPts=256))
+        self.addItem(self.image)
+        self.getViewBox().setMouseEnabled(y=False)
+        self.getViewBox().sigXRangeChanged.connect(self.render_visible)
+        self.jobs = CancellableJobRunner(self)
+        self.jobs.finished.connect(self.show_visible_power)
+
+    def _show_source(self, source, key, owns_key):
+        if self.owns_key and self.key is not None and self.key != key:
+            self.cache.forget(self.key)
+        changed = source is not self.source
+        self.source = source
+        self.key = key
+        self.owns_key = owns_key
+        if changed:
+            self.setLimits(xMin=0, xMax=source.duration, yMin=0, yMax=source.sample_rate / 2)
+            self.setRange(xRange=(0, source.duration), yRange=(0, source.sample_rate / 2), padding=0)
+
+    def set_signal(self, source, key=None):
+        """Show `source`; `key` identifies the signal in the tile cache."""
+        self._show_source(source, key if key is not None else self.cache.key_for(source), True)
+        self.row_power = None
+        self.render_visible()
+
+    def set_derived(self, base_source, row_gains):
+        """Show `base_source`'s spectrogram with frequency row i scaled by row_gains[i].
+
+        An equalized signal's spectrogram is, to good approximation, its input's
+        with each row scaled by the squared gain, so only rows whose gain changed
+        since the last call are recomputed.
+        """
+        row_power = np.asarray(row_gains, dtype=np.float32) ** 2
+        if base_source is not self.base_source or self.row_power is None:
+            self._show_source(base_source, self.cache.key_for(base_source), False)
+            self.row_power = row_power
+            self.render_visible()
+            return
+        rows = np.flatnonzero(row_power != self.row_power)
+        self.row_power = row_power
+        if len(rows) and self.base_power is not None:
+            self.image_db[rows] = 10 * np.log10(self.base_power[rows] * row_power[rows, None] + 1e-10)
+            self.draw()
+
+    def clear_signal(self):
+        self.jobs.cancel()
+        self.source = None
+        self.base_power = None
+        self.base_source = None
+        self.image.clear()
+
+    def render_visible(self):
+        """Recompute the visible image on a worker; the last image stays up meanwhile."""
+        if self.source is None:
+            return
+        if self.cache.frame_count(self.source) == 0:
+            self.jobs.cancel()
+            self.image.clear()
+            return
+        key, source = self.key, self.source
+        start_time, end_time = self.getViewBox().viewRange()[0]
+        width = int(self.getViewBox().width())
+        self.jobs.submit(
+            lambda token: self.cache.visible_power(key, source, start_time, end_time, width, token)
+        )
+
+    def show_visible_power(self, result):
+        power, first, step, source = result
+        if source is not self.source:
+            return
+        self.base_power, self.base_source, self.first, self.step = power, source, first, step
+        top = 10 * np.log10(power.max() + 1e-10)
+        self.levels = (top - 80, top)
+        if self.row_power is not None:
+            power = power * self.row_power[:, None]
+        self.image_db = 10 * np.log10(power + 1e-10)
+        self.draw()
+
+    def draw(self):
+        with span("spectrogram_draw"):
+            self.image.setImage(self.image_db.T, levels=self.levels)
+            hop_time = self.cache.hop / self.source.sample_rate
+            self.image.setRect(QRectF(
+                self.first * hop_time, 0, self.image_db.shape[1] * self.step * hop_time, self.source.sample_rate / 2
+            ))
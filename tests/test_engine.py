@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from engine import MODE_BANDS, EqualizerEngine, slider_gain
+
+SAMPLE_RATE = 1000
+
+
+def test_reload_recompiles_bands():
+    engine = EqualizerEngine()
+    engine.load(np.random.default_rng(0).standard_normal(3000), SAMPLE_RATE)
+    engine.set_bands([(0, 100), (100, 500)])
+    engine.load(np.random.default_rng(1).standard_normal(1000), SAMPLE_RATE)
+    engine.set_band_gains([0.5, 2.0])
+    assert engine.output().shape == (1000,)
+    assert len(engine.gains) == len(engine.freqs)
+
+
+def test_set_gain_before_bands_raises():
+    engine = EqualizerEngine()
+    engine.load(np.zeros(100), SAMPLE_RATE)
+    with pytest.raises(RuntimeError, match="set_bands"):
+        engine.set_gain(0, 2.0)
+
+
+def test_float32_output_matches_float64():
+    sample_rate = 44100
+    t = np.arange(10 * sample_rate) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.05 * np.random.default_rng(0).standard_normal(len(t))
+    bands = MODE_BANDS["Musical Mode"][1]
+    gains = [slider_gain(value) for value in (2, 8, 5, 10, 0, 7)]
+    outputs = []
+    for dtype in (np.float64, np.float32):
+        engine = EqualizerEngine(dtype=dtype)
+        engine.load(signal.astype(dtype), sample_rate)
+        engine.set_bands(bands)
+        engine.set_band_gains(gains)
+        outputs.append(engine.output())
+    expected, actual = outputs
+    assert actual.dtype == np.float32
+    error = actual - expected
+    assert np.sqrt(np.mean(error ** 2) / np.mean(expected ** 2)) < 1e-6
+    assert np.abs(error).max() < 1e-6 * np.abs(expected).max()
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from engine import MODE_BANDS, EqualizerEngine, StreamingEqualizer, WienerFilter, slider_gain, spectrum_magnitudes
+from fft_backend import backend
+
+SAMPLE_RATE = 44100
+MUSICAL_BANDS = MODE_BANDS["Musical Mode"][1]
+
+
+@pytest.fixture
+def signal():
+    rng = np.random.default_rng(0)
+    t = np.arange(3 * SAMPLE_RATE) / SAMPLE_RATE
+    return 0.3 * np.sin(2 * np.pi * 440 * t) + 0.2 * np.sin(2 * np.pi * 3000 * t) + 0.05 * rng.standard_normal(len(t))
+
+
+def whole_file(signal, freq_ranges, band_gains):
+    engine = EqualizerEngine()
+    engine.load(signal, SAMPLE_RATE)
+    engine.set_bands(freq_ranges)
+    engine.set_band_gains(band_gains)
+    return engine.output()
+
+
+def streamed(signal, freq_ranges, band_gains, read_size=10000):
+    equalizer = StreamingEqualizer(SAMPLE_RATE, freq_ranges, band_gains)
+    blocks = (signal[start:start + read_size] for start in range(0, len(signal), read_size))
+    return np.concatenate(list(equalizer.process(blocks)))
+
+
+def relative_rms(actual, expected):
+    return np.sqrt(np.mean((actual - expected) ** 2) / np.mean(expected ** 2))
+
+
+def test_unity_gains_match_whole_file(signal):
+    gains = np.ones(len(MUSICAL_BANDS))
+    output = streamed(signal, MUSICAL_BANDS, gains)
+    assert output.shape == signal.shape
+    np.testing.assert_allclose(output, whole_file(signal, MUSICAL_BANDS, gains), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("sliders", [(0, 10, 5, 3, 8, 5), (3, 7, 5, 5, 6, 4), (5, 5, 5, 5, 0, 10)])
+def test_musical_mode_matches_whole_file(signal, sliders):
+    # Frame-wise filtering smears each gain step over a few of the block's 10.8 Hz
+    # bins, so the outputs agree to within 2% of the signal's RMS rather than exactly
+    # (more for a tone sitting a few bins from the edge of a muted band).
+    gains = [slider_gain(value) for value in sliders]
+    assert relative_rms(streamed(signal, MUSICAL_BANDS, gains), whole_file(signal, MUSICAL_BANDS, gains)) < 0.02
+
+
+@pytest.mark.parametrize("read_size", [1000, 4096, 65536])
+def test_output_does_not_depend_on_block_size(signal, read_size):
+    gains = [slider_gain(value) for value in (0, 10, 5, 3, 8, 5)]
+    np.testing.assert_allclose(
+        streamed(signal, MUSICAL_BANDS, gains, read_size), streamed(signal, MUSICAL_BANDS, gains), atol=1e-12
+    )
+
+
+def test_stereo_channels_match_mono_runs(signal):
+    stereo = np.column_stack((signal, signal[::-1]))
+    gains = [slider_gain(value) for value in (0, 10, 5, 3, 8, 5)]
+    output = streamed(stereo, MUSICAL_BANDS, gains)
+    assert output.shape == stereo.shape
+    for channel in range(2):
+        np.testing.assert_allclose(output[:, channel], streamed(stereo[:, channel], MUSICAL_BANDS, gains), atol=1e-12)
+
+
+@pytest.mark.parametrize("max_frame_bytes", [512 * 2 ** 20, 0])
+def test_wiener_magnitudes_match_output_spectrum_energy(signal, max_frame_bytes):
+    wiener = WienerFilter(max_frame_bytes=max_frame_bytes)
+    wiener.load(signal, SAMPLE_RATE)
+    wiener.set_noise_range(0, SAMPLE_RATE // 2)
+    output, freqs, magnitudes = wiener.apply(2.0)
+    exact = spectrum_magnitudes(backend.rfft(output))
+    assert len(freqs) == len(magnitudes)
+    # Frame bins are wider than the whole signal's: compare total energy per bin count.
+    ratio = np.mean(magnitudes ** 2) / np.mean(exact ** 2)
+    assert abs(ratio - 1) < 0.02
@@ -0,0 +1,188 @@
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+from instrumentation import instruments
+from signal_source import ArraySource
+
+
+class WaveformPyramid:
+    """Min/max decimation pyramid of a signal for plotting.
+
+    Level k holds one (min, max) pair per `base_factor * 2**k` samples, so any view
+    can be drawn from the level whose bucket is about one screen pixel wide and the
+    redraw cost follows the plot width instead of the sample count. `packed` holds
+    every level as one (2, total) min/max array; passing it back in (e.g. from the
+    sidecar cache) skips reading the source.
+    """
+
+    def __init__(self, source, base_factor=64, read_size=2 ** 20, packed=None):
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.length = len(source)
+        self.base_factor = base_factor
+        if packed is not None:
+            self.levels = []
+            offset = 0
+            for size in self.level_sizes():
+                self.levels.append((packed[0, offset:offset + size], packed[1, offset:offset + size]))
+                offset += size
+            return
+
+        read_size -= read_size % base_factor
+        mins, maxs = [], []
+        for start in range(0, self.length, read_size):
+            block = source.read(start, start + read_size)
+            full = len(block) - len(block) % base_factor
+            if full:
+                buckets = block[:full].reshape(-1, base_factor)
+                mins.append(buckets.min(axis=1))
+                maxs.append(buckets.max(axis=1))
+            if full < len(block):
+                mins.append(block[full:].min(keepdims=True))
+                maxs.append(block[full:].max(keepdims=True))
+        self.levels = [(np.concatenate(mins), np.concatenate(maxs))] if mins else []
+
+        while self.levels and len(self.levels[-1][0]) > 512:
+            level_min, level_max = self.levels[-1]
+            pairs = len(level_min) // 2 * 2
+            next_min = np.minimum(level_min[:pairs:2], level_min[1:pairs:2])
+            next_max = np.maximum(level_max[:pairs:2], level_max[1:pairs:2])
+            if pairs < len(level_min):
+                next_min = np.append(next_min, level_min[-1])
+                next_max = np.append(next_max, level_max[-1])
+            self.levels.append((next_min, next_max))
+
+    def level_sizes(self):
+        """Bucket count of each level."""
+        sizes = [-(-self.length // self.base_factor)] if self.length else []
+        while sizes and sizes[-1] > 512:
+            sizes.append(-(-sizes[-1] // 2))
+        return sizes
+
+    @property
+    def packed(self):
+        if not self.levels:
+            return np.zeros((2, 0))
+        return np.stack([np.concatenate(values) for values in zip(*self.levels)])
+
+    @property
+    def duration(self):
+        return self.length / self.sample_rate if self.sample_rate else 0
+
+    @property
+    def nbytes(self):
+        return sum(level_min.nbytes + level_max.nbytes for level_min, level_max in self.levels)
+
+    def view(self, start_time, end_time, width_px):
+        """Return (x, y) for the samples between the two times at `width_px` resolution."""
+        start = max(0, int(np.floor(start_time * self.sample_rate)))
+        stop = min(self.length, int(np.ceil(end_time * self.sample_rate)) + 1)
+        if stop <= start or not self.levels:
+            return np.zeros(0), np.zeros(0)
+
+        samples_per_pixel = (stop - start) / max(1, width_px)
+        if samples_per_pixel < self.base_factor:
+            y = self.source.read(start, stop)
+            return np.arange(start, start + len(y)) / self.sample_rate, y
+
+        level = min(int(np.log2(samples_per_pixel / self.base_factor)), len(self.levels) - 1)
+        bucket = self.base_factor * 2 ** level
+        level_min, level_max = self.levels[level]
+        first, last = start // bucket, min(len(level_min), -(-stop // bucket))
+
+        y = np.empty(2 * (last - first))
+        y[0::2] = level_min[first:last]
+        y[1::2] = level_max[first:last]
+        x = np.repeat(np.arange(first, last) * bucket / self.sample_rate, 2)
+        return x, y
+
+
+def spectrum_pyramid(magnitudes, freqs):
+    """Min/max pyramid over a magnitude spectrum; its "time" axis is frequency in Hz."""
+    spacing = freqs[1] - freqs[0] if len(freqs) > 1 else 1.0
+    return WaveformPyramid(ArraySource(magnitudes, 1 / spacing))
+
+
+class CineRenderer:
+    """Scrolling cine-mode view backed by a preallocated min/max ring buffer.
+
+    The x-axis is built once and the curve is shifted with setPos, so each frame
+    only decimates the samples played since the previous one and copies the ring
+    into display order; the work is bounded by `columns`, not the window length.
+    """
+
+    def __init__(self, plot_item, window_size=3, columns=1024, history=240):
+        self.plot_item = plot_item
+        self.window_size = window_size
+        self.columns = columns
+        self.ring = np.full((columns, 2), np.nan)
+        self.display = np.empty(2 * columns)
+        self.x = None
+        self.source = None
+        self.column_samples = 1
+        self.head = 0
+        self.written = 0
+        self.frame_times = deque(maxlen=history)
+
+    def reset(self):
+        self.source = None
+
+    def _attach(self, source):
+        self.source = source
+        self.column_samples = max(1, int(round(self.window_size * source.sample_rate / self.columns)))
+        self.x = np.repeat(np.arange(self.columns) * self.column_samples / source.sample_rate, 2)
+        self.ring.fill(np.nan)
+        self.head = 0
+        self.written = 0
+
+    def _write_columns(self, first, last):
+        """Decimate columns [first, last) from the source into the ring."""
+        block = self.source.read(first * self.column_samples, last * self.column_samples)
+        count = last - first
+        new = np.full((count, 2), np.nan)
+        full = len(block) // self.column_samples
+        if full:
+            buckets = block[: full * self.column_samples].reshape(full, self.column_samples)
+            new[:full, 0] = buckets.min(axis=1)
+            new[:full, 1] = buckets.max(axis=1)
+        rest = block[full * self.column_samples:]
+        if full < count and len(rest):
+            new[full] = rest.min(), rest.max()
+        rows = (self.head + np.arange(count)) % self.columns
+        self.ring[rows] = new
+        self.head = (self.head + count) % self.columns
+
+    def render(self, source, position):
+        """Draw the `window_size` seconds ending at `position` and record the frame time."""
+        started = perf_counter()
+        if source is not self.source:
+            self._attach(source)
+        target = max(0, int(position * source.sample_rate / self.column_samples))
+        new_columns = target - self.written
+        if new_columns < 0 or new_columns > self.columns:
+            self.ring.fill(np.nan)
+            self.head = 0
+            self.written = max(0, target - self.columns)
+            new_columns = target - self.written
+        if new_columns:
+            self._write_columns(self.written, target)
+            self.written = target
+
+        oldest = self.head * 2
+        self.display[: 2 * self.columns - oldest] = self.ring.ravel()[oldest:]
+        self.display[2 * self.columns - oldest:] = self.ring.ravel()[:oldest]
+        self.plot_item.setData(self.x, self.display, connect="finite")
+        self.plot_item.setPos((target - self.columns) * self.column_samples / source.sample_rate, 0)
+        elapsed = perf_counter() - started
+        self.frame_times.append(elapsed)
+        if instruments.enabled:
+            instruments.record("cine_frame", started, elapsed)
+
+    def frame_time_stats(self):
+        """Mean and worst recent frame time in seconds."""
+        if not self.frame_times:
+            return 0.0, 0.0
+        times = np.fromiter(self.frame_times, dtype=float)
+        return times.mean(), times.max()
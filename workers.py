@@ -0,0 +1,160 @@
+import threading
+
+import numpy as np
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from cache import CachedOutput
+from signal_source import ArraySource
+from waveform import WaveformPyramid, spectrum_pyramid
+
+
+class _EqualizerJob(QRunnable):
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+
+    def run(self):
+        self.worker.process_pending()
+
+
+class EqualizerWorker(QObject):
+    """Runs engine reconstructions on a background thread, latest gains win.
+
+    Only one job runs at a time; gains submitted while it is busy overwrite each
+    other, so a slider drag costs one reconstruction per finished job instead of
+    one per intermediate value. With an OutputCache, gain settings seen before
+    are served from it. The output's waveform pyramid for the displayed channel
+    and the magnitude spectrum's pyramid are built here too, so the GUI thread
+    only draws them.
+    """
+
+    result_ready = pyqtSignal(int, object, object, object, object, object)
+
+    def __init__(self, engine, cache=None, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.cache = cache
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._pending = None
+        self._running = False
+
+    def submit(self, band_gains, channel=0):
+        """Queue a new gain state (and the channel to draw), replacing any state not yet started."""
+        with self._lock:
+            self._pending = (np.array(band_gains, dtype=float), channel)
+            if self._running:
+                return
+            self._running = True
+        self.pool.start(_EqualizerJob(self))
+
+    def sync(self):
+        """Drop queued work and wait for the running job, so the engine can be touched."""
+        with self._lock:
+            self._pending = None
+            self.generation += 1
+        self.pool.waitForDone()
+
+    def process_pending(self):
+        while True:
+            with self._lock:
+                pending, self._pending = self._pending, None
+                generation = self.generation
+                if pending is None:
+                    self._running = False
+                    return
+            band_gains, channel = pending
+            output, magnitudes, pyramid, spectrum = self._reconstruct(band_gains, channel)
+            with self._lock:
+                superseded = self._pending is not None or generation != self.generation
+            if not superseded:
+                self.result_ready.emit(generation, output, magnitudes, band_gains, pyramid, spectrum)
+
+    def _pyramid(self, output, channel):
+        return WaveformPyramid(ArraySource(output, self.engine.sample_rate, channel))
+
+    def _spectrum(self, magnitudes):
+        return spectrum_pyramid(magnitudes, self.engine.positive_freqs)
+
+    def _reconstruct(self, band_gains, channel):
+        engine = self.engine
+        if self.cache is None:
+            engine.set_band_gains(band_gains)
+            output, magnitudes = engine.output(), engine.modified_magnitudes
+            return output, magnitudes, self._pyramid(output, channel), self._spectrum(magnitudes)
+        key = self.cache.key(engine.signal_key, engine.bands.freq_ranges, band_gains)
+        entry = self.cache.get(key)
+        if entry is not None:
+            engine.restore(band_gains, entry.output)
+            output, magnitudes = entry.output, entry.magnitudes
+        else:
+            engine.set_band_gains(band_gains)
+            output, magnitudes = engine.output(), engine.modified_magnitudes
+            self.cache.put(key, CachedOutput(output, magnitudes))
+        pyramid = self.cache.extra(output, ("pyramid", channel))
+        if pyramid is None:
+            pyramid = self._pyramid(output, channel)
+            self.cache.attach(output, ("pyramid", channel), pyramid, pyramid.nbytes)
+        spectrum = self.cache.extra(output, "spectrum_pyramid")
+        if spectrum is None:
+            spectrum = self._spectrum(magnitudes)
+            self.cache.attach(output, "spectrum_pyramid", spectrum, spectrum.nbytes)
+        return output, magnitudes, pyramid, spectrum
+
+
+class CancellationToken:
+    """Flag a running job polls to find out it has been superseded."""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _CancellableJob(QRunnable):
+    def __init__(self, runner, function, token):
+        super().__init__()
+        self.runner = runner
+        self.function = function
+        self.token = token
+
+    def run(self):
+        if self.token.cancelled:
+            return
+        result = self.function(self.token)
+        if result is not None and not self.token.cancelled:
+            self.runner._job_done.emit(self.token, result)
+
+
+class CancellableJobRunner(QObject):
+    """Runs `function(token)` on the global thread pool; a newer job cancels the older one.
+
+    `finished` is emitted on the owner's thread with the result of the latest job only;
+    a job returns None (or checks `token.cancelled`) to bail out early.
+    """
+
+    finished = pyqtSignal(object)
+    _job_done = pyqtSignal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.token = None
+        self._job_done.connect(self._deliver)
+
+    def submit(self, function):
+        self.cancel()
+        self.token = CancellationToken()
+        QThreadPool.globalInstance().start(_CancellableJob(self, function, self.token))
+
+    def cancel(self):
+        if self.token is not None:
+            self.token.cancel()
+            self.token = None
+
+    def _deliver(self, token, result):
+        if token is self.token:
+            self.token = None
+            self.finished.emit(result)